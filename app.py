@@ -2,9 +2,19 @@ import streamlit as st
 import hashlib
 import pandas as pd
 from datetime import datetime
-from products import products
-from db_manager import add_item, get_all_items, decrease_item_stock, create_table, get_all_journal_entries, add_journal_entry
+import catalog as catalog_index
+from cart import Cart, Wishlist
+from catalog import get_catalog
+from db_manager import add_item, get_all_items, decrease_item_stock, get_all_journal_entries, add_journal_entry, get_conn, transaction, get_accounts, get_chart_of_accounts, add_account, ACCOUNT_TYPES, get_account_ledger_page, get_trial_balance_as_of, get_account_activity, ledger_start_cursor, get_closed_periods, get_open_periods, close_period, reopen_last_period, archive_closed_periods, get_archived_through, get_stock_as_of, get_stock_movements, search_products, iter_item_frames, iter_journal_frames, to_rupiah
+from migrations import migrate
 from checkout import show_checkout_form
+import exporter
+import financials
+import ledger
+import precompute
+import thumbnails
+from read_cache import cached_read
+from utils import format_rupiah, format_date, rupiah_column
 import os
 import sqlite3 
 
@@ -118,9 +128,9 @@ def init_session_state():
     
     # E-commerce states
     if "cart" not in st.session_state:
-        st.session_state.cart = []
+        st.session_state.cart = Cart()
     if "wishlist" not in st.session_state:
-        st.session_state.wishlist = []
+        st.session_state.wishlist = Wishlist()
     if "current_page" not in st.session_state:
         st.session_state.current_page = "🏡 Home"
     if "selected_product" not in st.session_state:
@@ -133,29 +143,56 @@ def init_session_state():
 
 # E-COMMERCE COMPONENTS
 
-def get_product_filters(): 
+SORT_OPTIONS = {
+    "Price: Low to High": "price_asc",
+    "Price: High to Low": "price_desc",
+    "Rating": "rating",
+    "Newest": "newest",
+}
+
+def get_product_filters(categories):
+    search_query = st.sidebar.text_input("🔍 Cari Produk", key="product_search")
     category_filter = st.sidebar.selectbox(
         "📂 Filter by Category",
-        ["All"] + list(set(p["category"] for p in products))
+        ["All"] + list(categories)
     )
     sort_option = st.sidebar.selectbox(
         "🔽 Sort by",
-        ["Price: Low to High", "Price: High to Low", "Rating", "Newest"]
+        list(SORT_OPTIONS)
     )
-    return category_filter, sort_option
-
-def sort_products(products, sort_option):
-    if sort_option == "Price: Low to High":
-        return sorted(products, key=lambda x: x["price"])
-    elif sort_option == "Price: High to Low":
-        return sorted(products, key=lambda x: x["price"], reverse=True)
-    elif sort_option == "Rating":
-        return sorted(products, key=lambda x: x.get("rating", 0), reverse=True)
-    return products 
+    page_size = st.sidebar.selectbox(
+        "📄 Produk per halaman",
+        catalog_index.PAGE_SIZES,
+        index=catalog_index.PAGE_SIZES.index(catalog_index.DEFAULT_PAGE_SIZE),
+        key="product_page_size"
+    )
+    return search_query, category_filter, sort_option, page_size
+
+def product_pagination(total, page_size, filters):
+    """Prev/next controls for the product grid; returns the current 1-based page number."""
+    # Filter, urutan, atau ukuran halaman berubah -> kembali ke halaman pertama
+    if st.session_state.get("product_filters") != filters:
+        st.session_state.product_filters = filters
+        st.session_state.product_page = 1
+    pages = catalog_index.page_count(total, page_size)
+    number = min(st.session_state.get("product_page", 1), pages)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Sebelumnya", disabled=number == 1, key="products_prev"):
+            st.session_state.product_page = number - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Halaman {number} dari {pages} ({total} produk)")
+    with col3:
+        if st.button("Berikutnya ➡️", disabled=number == pages, key="products_next"):
+            st.session_state.product_page = number + 1
+            st.rerun()
+    return number
 
 def display_products_card(product, col):
     with col:
-        st.image(product.get("image", "https://via.placeholder.com/150"), width=150)
+        st.image(catalog_index.load_image(product.get("image"), thumbnails.CARD_WIDTH) or "https://via.placeholder.com/150", width=thumbnails.CARD_WIDTH)
         st.subheader(product["name"])
         st.write(f"Price: Rp{product['price']:,.0f}".replace(",", "."))
         st.write(f"⭐ {product.get('rating', 'No rating')} / 5")
@@ -168,28 +205,33 @@ def display_products_card(product, col):
                 st.rerun()
         with col2:
             if st.button(f"❤️ Add - {product['name']}", key=f"add_{product['name']}"):
-                if product not in st.session_state.wishlist:
-                    st.session_state.wishlist.append(product)
+                if st.session_state.wishlist.add(product["id"], product["price"]):
                     st.success(f"{product['name']} Added to Wishlist!")
                 else:
                     st.warning(f"{product['name']} is already in your Wishlist!")
 
-def get_filtered_products(products, category_filter, min_price, max_price):
-    filtered = [p for p in products if
-                (category_filter == "All" or p["category"] == category_filter)
-                and min_price <= p["price"] <= max_price]
-    return filtered
-        
 def show_products():
     st.header("🛍️ Products")
-    category_filter, sort_option = get_product_filters()
+    catalog = get_catalog()
+    search_query, category_filter, sort_option, page_size = get_product_filters(catalog.categories)
+
+    if search_query.strip():
+        # Indeks FTS5 di SQLite, hasil terurut relevansi (BM25)
+        ids = search_products(search_query, None if category_filter == "All" else category_filter)
+        sorted_products = [catalog.get(i) for i in ids if catalog.get(i) is not None]
+        if not sorted_products:
+            st.info(f"Tidak ada produk yang cocok dengan \"{search_query}\".")
+    else:
+        # Kategori dan urutan sudah terindeks di katalog; tidak ada filter/sort ulang per rerun
+        sorted_products = catalog.query(category_filter, SORT_OPTIONS[sort_option])
 
-    filtered_products = get_filtered_products(
-        products, category_filter, 0, float("inf"))
-    sorted_products = sort_products(filtered_products, sort_option)
+    # Hanya halaman yang terlihat yang dirender dan dimuat gambarnya;
+    # gambar halaman berikutnya dibaca ke cache di latar belakang
+    number = product_pagination(len(sorted_products), page_size, (search_query, category_filter, sort_option, page_size))
+    catalog_index.prefetch_images(catalog_index.page(sorted_products, number + 1, page_size), thumbnails.CARD_WIDTH)
 
     cols = st.columns(3)
-    for idx, product in enumerate(sorted_products):
+    for idx, product in enumerate(catalog_index.page(sorted_products, number, page_size)):
         display_products_card(product, cols[idx % 3])
 
 def show_product_details():
@@ -200,7 +242,7 @@ def show_product_details():
         st.rerun()
         return
     
-    st.image(product.get("image", "https://via.placeholder.com/300"), width=300)
+    st.image(catalog_index.load_image(product.get("image"), thumbnails.DETAIL_WIDTH) or "https://via.placeholder.com/300", width=thumbnails.DETAIL_WIDTH)
     st.subheader(product["name"])
     st.write(f"Price: Rp{product['price']:,.0f}".replace(",", "."))
     st.write(f"📂 Category: {product['category']}")
@@ -227,20 +269,11 @@ def show_product_details():
         qty = st.number_input("Quantity", min_value=1, value=1, key="detail_qty")
     with col2:
         if st.button("🛒 Add to Cart"):
-            item_in_cart = next((item for item in st.session_state.cart if item["name"] == product["name"]), None)
-            if item_in_cart:
-                item_in_cart["qty"] += qty
-                item_in_cart["total"] = item_in_cart["qty"] * item_in_cart["price"]
-            else:
-                new_item = product.copy()
-                new_item['qty'] = qty
-                new_item['total'] = qty * product['price']
-                st.session_state.cart.append(new_item)
+            st.session_state.cart.add(product["id"], qty, product["price"])
             st.success(f"{product['name']} (x{qty}) added to cart!")
     with col3:
         if st.button("❤️ Add to Wishlist"):
-            if product not in st.session_state.wishlist:
-                st.session_state.wishlist.append(product)
+            if st.session_state.wishlist.add(product["id"], product["price"]):
                 st.success(f"{product['name']} added to wishlist!")
             else:
                 st.warning(f"{product['name']} is already in your wishlist!")
@@ -256,49 +289,48 @@ def show_wishlist():
         st.write("Your wishlist is empty.")
         return
 
-    for idx, item in enumerate(st.session_state.wishlist[:]):  # Create a copy for iteration
+    catalog = get_catalog()
+    for product_id, price in st.session_state.wishlist:
+        product = catalog.get(product_id)
+        name = product["name"] if product else "(produk tidak tersedia)"
         col1, col2 = st.columns([3, 2])
 
         with col1:
-            st.subheader(f"{item['name']}")
-            st.write(f"Unit Price: Rp{item['price']:,.0f}".replace(",", "."))
+            st.subheader(name)
+            st.write(f"Unit Price: Rp{price:,.0f}".replace(",", "."))
 
-            qty_key = f"wishlist_qty_{idx}"
+            qty_key = f"wishlist_qty_{product_id}"
             if qty_key not in st.session_state:
                 st.session_state[qty_key] = 1
 
             col_qty1, col_qty2, col_qty3 = st.columns([1, 2, 1])
             with col_qty1:
-                if st.button("-", key=f"wishlist_minus_{idx}"):
+                if st.button("-", key=f"wishlist_minus_{product_id}"):
                     if st.session_state[qty_key] > 1:
                         st.session_state[qty_key] -= 1
                         st.rerun()
             with col_qty2:
                 st.session_state[qty_key] = st.number_input(
                     "Quantity", min_value=1, value=st.session_state[qty_key], 
-                    key=f"wishlist_input_{idx}", label_visibility="collapsed"
+                    key=f"wishlist_input_{product_id}", label_visibility="collapsed"
                 )
             with col_qty3:
-                if st.button("+", key=f"wishlist_plus_{idx}"):
+                if st.button("+", key=f"wishlist_plus_{product_id}"):
                     st.session_state[qty_key] += 1
                     st.rerun()
 
-            total = st.session_state[qty_key] * item['price']
+            total = st.session_state[qty_key] * price
             st.write(f"**Total: Rp{total:,.0f}**".replace(",", "."))
 
         with col2:
-            if st.button(f"🛒 Move to Cart", key=f"move_{idx}"):
-                new_item = item.copy()
-                new_item['qty'] = st.session_state[qty_key]
-                new_item['total'] = total
-                st.session_state.cart.append(new_item)
-                st.session_state.wishlist.remove(item)
-                st.success(f"{new_item['name']} (x{new_item['qty']}) moved to Cart.")
+            if st.button(f"🛒 Move to Cart", key=f"move_{product_id}", disabled=product is None):
+                line = st.session_state.wishlist.move_to_cart(product_id, st.session_state[qty_key], st.session_state.cart)
+                st.success(f"{name} (x{line.qty}) moved to Cart.")
                 st.rerun()
                 
-            if st.button(f"❌ Remove", key=f"remove_wish_{idx}"):
-                st.session_state.wishlist.remove(item)
-                st.success(f"{item['name']} removed from wishlist.")
+            if st.button(f"❌ Remove", key=f"remove_wish_{product_id}"):
+                st.session_state.wishlist.remove(product_id)
+                st.success(f"{name} removed from wishlist.")
                 st.rerun()
 
 def show_cart():
@@ -308,30 +340,27 @@ def show_cart():
         st.write("Your cart is empty.")
         return
 
-    total_price = 0
-    for idx, item in enumerate(st.session_state.cart[:]):  # Create a copy for iteration
+    catalog = get_catalog()
+    for line in st.session_state.cart:
+        product = catalog.get(line.product_id) or {}
         col1, col2 = st.columns([1, 4])
 
         with col1:
-            st.image(item.get("image", "https://via.placeholder.com/100"), width=80)
+            st.image(catalog_index.load_image(product.get("image"), thumbnails.CART_WIDTH) or "https://via.placeholder.com/100", width=thumbnails.CART_WIDTH)
 
         with col2:
-            qty = item.get("qty", 1)
-            price = item.get("price", 0)
-            subtotal = qty * price
-            total_price += subtotal
-
-            st.markdown(f"**{item['name']}**")
-            st.write(f"Unit Price: Rp{price:,.0f}".replace(",", "."))
-            st.write(f"Quantity: {qty}")
-            st.write(f"Subtotal: Rp{subtotal:,.0f}".replace(",", "."))
+            st.markdown(f"**{product.get('name', '(produk tidak tersedia)')}**")
+            st.write(f"Unit Price: Rp{line.price:,.0f}".replace(",", "."))
+            st.write(f"Quantity: {line.qty}")
+            st.write(f"Subtotal: Rp{line.subtotal:,.0f}".replace(",", "."))
 
-            if st.button(f"❌ Remove", key=f"remove_{idx}"):
-                st.session_state.cart.remove(item)
+            if st.button(f"❌ Remove", key=f"remove_{line.product_id}"):
+                st.session_state.cart.remove(line.product_id)
                 st.rerun()
 
     st.markdown("---")
-    st.markdown(f"### 💰 Total Amount: Rp{total_price:,.2f}")
+    # Total dijaga Cart setiap kali isi keranjang berubah
+    st.markdown(f"### 💰 Total Amount: {format_rupiah(st.session_state.cart.total)}")
 
     if st.button("📂 Proceed to Checkout"):
         st.session_state.current_page = "🛍️ Checkout"
@@ -359,196 +388,129 @@ def show_checkout():
 # INVENTORY (ADMIN)
 from datetime import datetime
 
-# Database setup
-def init_db():
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS inventory
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT UNIQUE NOT NULL,
-                 stock INTEGER NOT NULL,
-                 price REAL NOT NULL)''')
-    conn.commit()
-    conn.close()
-
 # Product constants
 CHILI_PRODUCTS = [
     "Cabe Rawit Hijau", "Cabe Rawit Putih", "Cabe Hijau Keriting",
     "Cabe Rawit Merah", "Cabe Merah Ori", "Cabe Merah Keriting"
 ]
 
-def format_currency(value):
-    """Format numbers as Rp. with thousand separators"""
-    return f"Rp. {int(value):,}".replace(",", ".")
-
-def init_db():
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS inventory
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  name TEXT UNIQUE NOT NULL,
-                  stock INTEGER NOT NULL,
-                  price REAL NOT NULL)''')
-    conn.commit()
-    conn.close()
-
-def get_inventory():
-    """Get inventory with formatted currency values"""
-    conn = sqlite3.connect('inventory.db')
-    df = pd.read_sql("SELECT id, name AS 'Nama Barang', stock AS 'Stok', price AS 'Harga' FROM inventory", conn)
-    conn.close()
-    
-
-    df["Harga Formatted"] = df["Harga"].apply(format_currency)
-    df["Total"] = df["Stok"] * df["Harga"]
-    df["Total Formatted"] = df["Total"].apply(format_currency)
-    return df
-
 def update_stock(product_name, quantity_change):
-    conn = None
+    """Ubah stok dengan satu UPDATE bersyarat; stok tidak pernah bisa negatif"""
     try:
-        conn = sqlite3.connect('inventory.db')
-        c = conn.cursor()
-     
-        c.execute("SELECT id, stock FROM inventory WHERE name=?", (product_name,))
-        row = c.fetchone()
+        with transaction() as conn:
+            c = conn.execute(
+                "UPDATE inventory SET stock = stock + ? WHERE name = ? AND stock + ? >= 0",
+                (quantity_change, product_name, quantity_change)
+            )
+            if c.rowcount == 1:
+                return True, "Stok berhasil diperbarui"
+            row = conn.execute("SELECT 1 FROM inventory WHERE name=?", (product_name,)).fetchone()
         if not row:
             return False, "Produk tidak ditemukan"
-        
-        product_id, current_stock = row
-        new_stock = current_stock + quantity_change
-        
-        if new_stock < 0:
-            return False, "Stok tidak boleh negatif"
-        
-        c.execute("UPDATE inventory SET stock=? WHERE id=?", (new_stock, product_id))
-        conn.commit()
-        return True, "Stok berhasil diperbarui"
+        return False, "Stok tidak boleh negatif"
     except Exception as e:
-        if conn:
-            conn.rollback()
         return False, f"Error: {str(e)}"
-    finally:
-        if conn:
-            conn.close()
 
 #Buat Tambah produk baru
 def add_product(name, stock, price):
-    conn = None
     try:
-        conn = sqlite3.connect('inventory.db')
-        c = conn.cursor()
-        c.execute("INSERT INTO inventory (name, stock, price) VALUES (?, ?, ?)", (name, stock, price))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("INSERT INTO inventory (name, stock, price) VALUES (?, ?, ?)", (name, stock, to_rupiah(price)))
         return True, "Produk berhasil ditambahkan"
-    except sqlite3.IntegrityError:
-        return False, "Produk sudah ada"
+    except sqlite3.IntegrityError as e:
+        # UNIQUE(name) berarti produk sudah ada; CHECK berarti stok/harga tidak valid
+        if "UNIQUE" in str(e):
+            return False, "Produk sudah ada"
+        return False, f"Data produk tidak valid: {e}"
     except Exception as e:
-        if conn:
-            conn.rollback()
         return False, f"Error: {str(e)}"
-    finally:
-        if conn:
-            conn.close()
-
-def export_inventory():
-    df = get_inventory()
-    csv = df.to_csv(index=False)
-    st.download_button("📥 Export to CSV", data=csv, file_name="inventory_export.csv", mime="text/csv")
-
-# Tampilan halaman inventory
-def show_inventory_page():
-    st.header("📦 Manajemen Inventaris")
-    df = get_inventory()
-    
-    st.dataframe(
-        df[["Nama Barang", "Stok", "Harga Formatted", "Total Formatted"]]
-        .rename(columns={
-            "Harga Formatted": "Harga",
-            "Total Formatted": "Total"
-        }),
-        hide_index=True,
-        use_container_width=True
-    )
-    
-    export_inventory()
 
-    st.subheader("🔽 Kurangi Stok")
-    inventory_df = get_inventory()
-    product_names = CHILI_PRODUCTS
-
-    selected_product = st.selectbox("Pilih Barang", product_names)
-    
-    col1, col2 = st.columns([2, 1])
+def export_buttons(frames_factory, file_stem, key):
+    """CSV/XLSX download buttons; the file is only streamed out of SQLite when clicked"""
+    col1, col2 = st.columns(2)
     with col1:
-        qty = st.number_input("Jumlah Pengurangan", min_value=1, step=1)
-    with col2:
-        if st.button("Kurangi"):
-            success, msg = update_stock(selected_product, -qty)
-            if success:
-                st.success(msg)
-            else:
-                st.error(msg)
+        st.download_button(
+            "📥 Export to CSV",
+            data=lambda: exporter.csv_file(frames_factory()),
+            file_name=f"{file_stem}.csv",
+            mime=exporter.CSV_MIME,
+            key=f"{key}_csv"
+        )
+    if exporter.XLSX_AVAILABLE:
+        with col2:
+            st.download_button(
+                "📥 Export to XLSX",
+                data=lambda: exporter.xlsx_file(frames_factory()),
+                file_name=f"{file_stem}.xlsx",
+                mime=exporter.XLSX_MIME,
+                key=f"{key}_xlsx"
+            )
 
-def get_all_journal_entries():
-    """Get all journal entries"""
-    conn = sqlite3.connect('inventory.db')
-    c = conn.cursor()
-    c.execute("SELECT id, date, debit_account, credit_account, amount, description FROM journal ORDER BY date")
-    entries = c.fetchall()
-    conn.close()
-    return entries
-
-def add_journal_entry(date, debit_account, credit_account, amount, description=""):
-    """Add new journal entry"""
-    try:
-        conn = sqlite3.connect('inventory.db')
-        c = conn.cursor()
-        c.execute('''INSERT INTO journal 
-                    (date, debit_account, credit_account, amount, description)
-                    VALUES (?, ?, ?, ?, ?)''',
-                 (date, debit_account, credit_account, amount, description))
-        conn.commit()
-        return True, "Journal entry added successfully"
-    except Exception as e:
-        return False, str(e)
-    finally:
-        conn.close()
+def export_inventory():
+    export_buttons(exporter.inventory_frames, "inventory_export", "export_inventory")
 
+JOURNAL_COLUMNS = {
+    "id": "ID", "tanggal": "Tanggal", "akun_debit": "Akun Debit",
+    "akun_kredit": "Akun Kredit", "jumlah": "Jumlah", "keterangan": "Keterangan"
+}
+INVENTORY_COLUMNS = {"nama": "Nama Barang", "stok": "Stok", "harga": "Harga", "nilai": "Nilai FIFO", "hpp": "HPP"}
+
+@cached_read
 def load_inventory_data():
     """Load inventory data"""
-    init_user_database()
-    rows = get_all_items()
-    if rows:
-        return pd.DataFrame(rows, columns=["ID", "Nama Barang", "Stok", "Harga"])
-    return pd.DataFrame(columns=["ID", "Nama Barang", "Stok", "Harga"])
-
-def load_journal_data():
-    """Load journal data"""
-    init_user_database()
-    rows = get_all_journal_entries()
-    if rows:
-        df = pd.DataFrame(rows, columns=["ID", "Tanggal", "Akun Debit", "Akun Kredit", "Jumlah", "Keterangan"])
-
-        df['Tanggal'] = pd.to_datetime(df['Tanggal']).dt.strftime('%d/%m/%Y')
-        return df
-    return pd.DataFrame(columns=["ID", "Tanggal", "Akun Debit", "Akun Kredit", "Jumlah", "Keterangan"])
-
-def format_currency(value):
-    """Format numbers as Rp. with thousand separators"""
-    return f"Rp. {int(value):,}".replace(",", ".")
+    frames = [
+        chunk[["kode", "nama", "stok", "harga"]].set_axis(["ID", "Nama Barang", "Stok", "Harga"], axis=1)
+        for chunk in iter_item_frames()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+@cached_read
+def load_journal_data(dari=None, sampai=None):
+    """Load journal rows in a date range (filtered by SQLite); dates stay ISO until displayed"""
+    frames = [chunk.rename(columns=JOURNAL_COLUMNS) for chunk in iter_journal_frames(dari=dari, sampai=sampai)]
+    return pd.concat(frames, ignore_index=True)
+
+def date_range_filter(key):
+    """Optional date range picker; returns (dari, sampai) as ISO strings, None for an open end"""
+    selected = st.date_input("Rentang Tanggal", value=(), key=key, format="DD/MM/YYYY")
+    dates = [d.strftime("%Y-%m-%d") for d in selected]
+    if not dates:
+        return None, None
+    if len(dates) == 1:
+        return dates[0], None
+    return dates[0], dates[1]
+
+def inventory_report_chunk(chunk):
+    """Rename one valuation chunk for display"""
+    return chunk[["id", "nama", "stok", "harga", "nilai", "hpp"]].rename(columns=INVENTORY_COLUMNS)
 
 def get_inventory():
-    """Get inventory with formatted currency columns"""
-    conn = sqlite3.connect('inventory.db')
-    df = pd.read_sql("SELECT id, name AS 'Nama Barang', stock AS 'Stok', price AS 'Harga' FROM inventory", conn)
-    conn.close()
-    
-    df['Total'] = df['Stok'] * df['Harga']
-    df['Harga Formatted'] = df['Harga'].apply(format_currency)
-    df['Total Formatted'] = df['Total'].apply(format_currency)
-    
-    return df
+    """Inventory with FIFO value and cost of goods sold, precomputed in the background"""
+    return inventory_report_chunk(precomputed_report("inventory"))
+
+def precomputed_report(name):
+    """Last finished background result of a heavy report, shown with its 'computed at' status"""
+    result = precompute.latest(name)
+    worker = precompute.get_precomputer()
+    error = worker.error(name)
+    if error is not None:
+        st.warning(f"Gagal memperbarui laporan ({error}); menampilkan hasil sebelumnya.")
+    # Polling hanya selama laporan ini sedang/akan dihitung ulang
+    if worker.is_refreshing(name):
+        report_refresh_status(name, result.computed_at)
+    else:
+        st.caption(f"🕒 Dihitung pada {result.computed_at:%d/%m/%Y %H:%M:%S}")
+    return result.value
+
+@st.fragment(run_every=1)
+def report_refresh_status(name, computed_at):
+    """Progress bar while a refresh runs; reruns the page once it has finished"""
+    worker = precompute.get_precomputer()
+    if not worker.is_refreshing(name):
+        st.rerun()
+    done, total = worker.progress()
+    st.progress(done / total if total else 0.0, text=f"Memperbarui laporan di latar belakang ({done}/{total})")
+    st.caption(f"🕒 Dihitung pada {computed_at:%d/%m/%Y %H:%M:%S}")
 
 def show_inventory_page():
     st.header("📦 Manajemen Inventaris")
@@ -556,20 +518,23 @@ def show_inventory_page():
     
     st.subheader("📋 Inventaris Saat Ini")
     st.dataframe(
-        df[['Nama Barang', 'Stok', 'Harga Formatted', 'Total Formatted']]
-        .rename(columns={
-            'Harga Formatted': 'Harga', 
-            'Total Formatted': 'Total'
-        }),
+        df[['Nama Barang', 'Stok', 'Harga', 'Nilai FIFO', 'HPP']],
         hide_index=True,
         use_container_width=True,
         column_config={
-            "Harga": st.column_config.TextColumn("Harga (Rp)"),
-            "Total": st.column_config.TextColumn("Total (Rp)")
+            "Harga": rupiah_column("Harga"),
+            "Nilai FIFO": rupiah_column("Nilai FIFO"),
+            "HPP": rupiah_column("HPP")
         }
     )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Nilai Persediaan (FIFO)", format_rupiah(df['Nilai FIFO'].sum()))
+    with col2:
+        st.metric("Harga Pokok Penjualan", format_rupiah(df['HPP'].sum()))
 
     export_inventory()
+    stock_history_section(df)
 
     # ➕ Add Product Form 
     st.subheader("➕ Tambah Produk Baru")
@@ -613,20 +578,37 @@ def show_inventory_page():
     else:
         st.warning("Tidak ada produk untuk dikurangi")
 
+def stock_history_section(df):
+    """Point-in-time stock and the movement log of one product"""
+    with st.expander("🕒 Riwayat Stok"):
+        as_of = st.date_input("Stok per tanggal", value=None, key="stock_as_of", format="DD/MM/YYYY")
+        if as_of is not None:
+            stok = pd.DataFrame(get_stock_as_of(as_of.strftime("%Y-%m-%d")), columns=["ID", "Nama Barang", "Stok"])
+            if stok.empty:
+                st.info("Belum ada stok pada tanggal itu.")
+            else:
+                st.dataframe(stok[["Nama Barang", "Stok"]], hide_index=True, use_container_width=True)
+        
+        if not df.empty:
+            product = st.selectbox("Pergerakan barang", df['Nama Barang'].unique(), key="movement_select")
+            movements = pd.DataFrame(get_stock_movements(product), columns=["Waktu", "Perubahan", "Stok Setelah"])
+            st.dataframe(movements, hide_index=True, use_container_width=True)
+
 # Jurnal Umum
 def jurnal_umum_page():
     """General journal page"""
     st.header("📝 Jurnal Umum")
     
     st.subheader("➕ Input Entri Jurnal")
+    accounts = get_accounts()
     with st.form("journal_form"):
         col1, col2 = st.columns(2)
         with col1:
             tanggal = st.date_input("Tanggal")
-            akun_debit = st.text_input("Akun Debit")
+            akun_debit = st.selectbox("Akun Debit", accounts, index=None)
         with col2:
-            akun_kredit = st.text_input("Akun Kredit")
-            jumlah = st.number_input("Jumlah (Rp)", min_value=0.0)
+            akun_kredit = st.selectbox("Akun Kredit", accounts, index=None)
+            jumlah = st.number_input("Jumlah (Rp)", min_value=0, step=1000)
         keterangan = st.text_area("Keterangan")
         
         if st.form_submit_button("Simpan Entri"):
@@ -640,96 +622,133 @@ def jurnal_umum_page():
                     st.rerun()
                 else:
                     st.error(f"❌ Gagal menyimpan: {msg}")
+    
+    chart_of_accounts_section()
 
     st.subheader("📋 Daftar Entri Jurnal")
-    df_jurnal = load_journal_data()
+    dari, sampai = date_range_filter("journal_range")
+    df_jurnal = load_journal_data(dari, sampai)
     
     if df_jurnal.empty:
         st.info("Belum ada entri jurnal.")
     else:
-        display_df = df_jurnal.copy()
-        display_df["Jumlah"] = display_df["Jumlah"].apply(format_currency)
-        
+        df_jurnal["Tanggal"] = format_date(df_jurnal["Tanggal"])
         st.dataframe(
-            display_df,
+            df_jurnal,
             use_container_width=True,
             column_config={
-                "Jumlah": st.column_config.NumberColumn(
-                    "Jumlah",
-                    format="Rp. %d"  
-                )
+                "Jumlah": rupiah_column("Jumlah")
             }
         )
+        export_buttons(
+            lambda: exporter.journal_frames(dari=dari, sampai=sampai),
+            "jurnal_umum", "export_journal"
+        )
 # Buku Besar       
+def chart_of_accounts_section():
+    """Chart of accounts table and form for new accounts"""
+    with st.expander("📒 Bagan Akun"):
+        chart = pd.DataFrame(get_chart_of_accounts(), columns=["ID", "Akun", "Tipe"])
+        chart["Tipe"] = chart["Tipe"].map(ACCOUNT_TYPES)
+        st.dataframe(chart, use_container_width=True, hide_index=True)
+        
+        with st.form("account_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                nama = st.text_input("Nama Akun")
+            with col2:
+                tipe = st.selectbox("Tipe Akun", list(ACCOUNT_TYPES), format_func=ACCOUNT_TYPES.get)
+            if st.form_submit_button("Tambah Akun"):
+                success, msg = add_account(nama, tipe)
+                if success:
+                    st.success(f"✅ {msg}")
+                    st.rerun()
+                else:
+                    st.error(f"❌ {msg}")
+
+def show_ledger_table(df_ledger):
+    """Render ledger rows (ID, Tanggal, Keterangan, Debit, Kredit, Saldo, optional Akun)"""
+    df_ledger = df_ledger.copy()
+    df_ledger["Tanggal"] = format_date(df_ledger["Tanggal"])
+    df_ledger["Referensi"] = "J-" + df_ledger["ID"].astype(str)
+    
+    columns = ["Akun"] if "Akun" in df_ledger.columns else []
+    st.dataframe(
+        df_ledger[columns + [
+            "Tanggal", 
+            "Keterangan", 
+            "Referensi", 
+            "Debit", 
+            "Kredit", 
+            "Saldo"
+        ]],
+        use_container_width=True,
+        column_config={
+            "Debit": rupiah_column("Debit"),
+            "Kredit": rupiah_column("Kredit"),
+            "Saldo": rupiah_column("Saldo")
+        }
+    )
+
 def buku_besar_page():
     """General ledger page with formatted currency"""
     st.header("📚 Buku Besar")
     
-    df_jurnal = load_journal_data()
+    akun_options = get_accounts()
     
-    if df_jurnal.empty:
+    if not akun_options:
         st.info("Belum ada data untuk ditampilkan.")
         return
     
-    akun_options = sorted(set(df_jurnal["Akun Debit"].tolist() + df_jurnal["Akun Kredit"].tolist()))
+    show_all = st.checkbox("Tampilkan semua akun sekaligus", key="ledger_all")
+    dari, sampai = date_range_filter("ledger_range")
+    
+    if show_all:
+        # Semua akun dibangun sekali dengan mesin buku besar tervektorisasi
+        df_all = ledger.filter_range(precomputed_report("ledger"), dari, sampai).rename(columns=exporter.LEDGER_COLUMNS)
+        show_ledger_table(df_all)
+        export_buttons(
+            lambda: exporter.all_ledger_frames(dari, sampai),
+            "buku_besar_semua_akun", "export_ledger_all"
+        )
+        return
+    
     selected_account = st.selectbox("Pilih Akun", akun_options)
     
-    debit_trans = df_jurnal[df_jurnal["Akun Debit"] == selected_account]
-    credit_trans = df_jurnal[df_jurnal["Akun Kredit"] == selected_account]
-    
-    ledger_data = []
-    
-    # Add debit entries
-    for _, row in debit_trans.iterrows():
-        ledger_data.append({
-            "Tanggal": row["Tanggal"],
-            "Keterangan": row["Keterangan"],
-            "Referensi": f"J-{row['ID']}",
-            "Debit": row["Jumlah"], 
-            "Kredit": 0,
-            "Debit Formatted": format_currency(row["Jumlah"]),  
-            "Kredit Formatted": "0"
-        })
-    
-    # Add credit entries
-    for _, row in credit_trans.iterrows():
-        ledger_data.append({
-            "Tanggal": row["Tanggal"],
-            "Keterangan": row["Keterangan"],
-            "Referensi": f"J-{row['ID']}",
-            "Debit": 0,
-            "Kredit": row["Jumlah"],  
-            "Debit Formatted": "0",
-            "Kredit Formatted": format_currency(row["Jumlah"])
-        })
-    
-    if not ledger_data:
+    # Cursor awal tiap halaman yang sudah dibuka (keyset pagination);
+    # dengan tanggal mulai, saldo awal diambil dari snapshot periode terdekat
+    if st.session_state.get("ledger_account") != (selected_account, dari, sampai):
+        st.session_state.ledger_account = (selected_account, dari, sampai)
+        st.session_state.ledger_cursors = [
+            ledger_start_cursor(selected_account, dari) if dari else None
+        ]
+    cursors = st.session_state.ledger_cursors
+    
+    # Hanya satu halaman akun terpilih dalam rentang tanggal; saldo berjalan dihitung di SQLite
+    ledger_rows, next_cursor = get_account_ledger_page(selected_account, cursors[-1], sampai=sampai)
+    
+    if not ledger_rows:
         st.info(f"Tidak ada transaksi untuk akun {selected_account}")
         return
     
-    df_ledger = pd.DataFrame(ledger_data)
-    df_ledger["Saldo"] = (df_ledger["Debit"] - df_ledger["Kredit"]).cumsum()
-    df_ledger["Saldo Formatted"] = df_ledger["Saldo"].apply(format_currency)
+    df_ledger = pd.DataFrame(ledger_rows, columns=["ID", "Tanggal", "Keterangan", "Debit", "Kredit", "Saldo"])
+    show_ledger_table(df_ledger)
     
-    st.dataframe(
-        df_ledger[[
-            "Tanggal", 
-            "Keterangan", 
-            "Referensi", 
-            "Debit Formatted", 
-            "Kredit Formatted", 
-            "Saldo Formatted"
-        ]].rename(columns={
-            "Debit Formatted": "Debit",
-            "Kredit Formatted": "Kredit",
-            "Saldo Formatted": "Saldo"
-        }),
-        use_container_width=True,
-        column_config={
-            "Debit": st.column_config.TextColumn("Debit (Rp)"),
-            "Kredit": st.column_config.TextColumn("Kredit (Rp)"),
-            "Saldo": st.column_config.TextColumn("Saldo (Rp)")
-        }
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Sebelumnya", disabled=len(cursors) == 1, key="ledger_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Halaman {len(cursors)}")
+    with col3:
+        if st.button("Berikutnya ➡️", disabled=next_cursor is None, key="ledger_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+    
+    export_buttons(
+        lambda: exporter.ledger_frames(selected_account, dari=dari, sampai=sampai),
+        f"buku_besar_{selected_account}", "export_ledger"
     )
 
 # Neraca Saldo
@@ -737,30 +756,36 @@ def neraca_saldo_page():
     """Trial balance page with formatted currency"""
     st.header("📑 Neraca Saldo")
     
-    df_jurnal = load_journal_data()
+    # Satu tanggal: saldo per tanggal itu. Rentang: saldo per akhir rentang + mutasi dalam rentang.
+    dari, sampai = date_range_filter("trial_balance_range")
+    as_of = sampai or dari
+    if as_of is None:
+        # Saldo per akun dijaga trigger di tabel account_balances; dibaca ulang di latar belakang setelah ada tulisan
+        trial_balance = precomputed_report("trial_balance")
+    else:
+        # Snapshot periode tertutup terdekat + jurnal sesudahnya
+        trial_balance = get_trial_balance_as_of(as_of)
     
-    if df_jurnal.empty:
+    if not trial_balance:
         st.info("Belum ada data untuk ditampilkan.")
         return
     
-    neraca = pd.concat([
-        df_jurnal.groupby("Akun Debit")["Jumlah"].sum().rename("Debit"),
-        df_jurnal.groupby("Akun Kredit")["Jumlah"].sum().rename("Kredit")
-    ], axis=1).fillna(0)
-    
-    neraca = neraca.reset_index().rename(columns={"index": "Akun"})
-    
-    display_neraca = neraca.copy()
-    display_neraca["Debit"] = display_neraca["Debit"].apply(format_currency)
-    display_neraca["Kredit"] = display_neraca["Kredit"].apply(format_currency)
+    neraca = pd.DataFrame(trial_balance, columns=["Akun", "Debit", "Kredit"])
+    if sampai:
+        mutasi = pd.DataFrame(get_account_activity(dari, sampai), columns=["Akun", "Mutasi Debit", "Mutasi Kredit"])
+        neraca = (neraca.merge(mutasi, on="Akun", how="left")
+                  .fillna({"Mutasi Debit": 0, "Mutasi Kredit": 0})
+                  .astype({"Mutasi Debit": "int64", "Mutasi Kredit": "int64"}))
     
     st.dataframe(
-        display_neraca,
+        neraca,
         use_container_width=True,
         column_config={
             "Akun": "Akun",
-            "Debit": st.column_config.TextColumn("Debit (Rp)"),
-            "Kredit": st.column_config.TextColumn("Kredit (Rp)")
+            "Debit": rupiah_column("Debit"),
+            "Kredit": rupiah_column("Kredit"),
+            "Mutasi Debit": rupiah_column("Mutasi Debit"),
+            "Mutasi Kredit": rupiah_column("Mutasi Kredit")
         }
     )
     
@@ -770,21 +795,114 @@ def neraca_saldo_page():
     st.markdown("---")
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Total Debit", format_currency(total_debit))
+        st.metric("Total Debit", format_rupiah(total_debit))
     with col2:
-        st.metric("Total Kredit", format_currency(total_kredit))
+        st.metric("Total Kredit", format_rupiah(total_kredit))
     
-    if abs(total_debit - total_kredit) > 0.01:
+    if total_debit != total_kredit:
         st.error("⚠️ Neraca tidak seimbang!")
     else:
         st.success("✓ Neraca seimbang")
+    
+    export_buttons(lambda: [neraca], "neraca_saldo", "export_trial_balance")
+    
+    period_close_section()
+
+# Laporan Keuangan
+def statement_table(section, total_label, total):
+    """One statement section (akun, jumlah) with a total row"""
+    table = pd.concat([
+        section.rename(columns={"akun": "Akun", "jumlah": "Jumlah"}),
+        pd.DataFrame({"Akun": [total_label], "Jumlah": [total]})
+    ], ignore_index=True)
+    st.dataframe(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Jumlah": rupiah_column("Jumlah")}
+    )
+    return table
+
+def laporan_keuangan_page():
+    """Income statement for a date range and balance sheet at its end"""
+    st.header("📊 Laporan Keuangan")
+    
+    dari, sampai = date_range_filter("statement_range")
+    laba_rugi, neraca = financials.financial_statements(dari, sampai)
+    
+    st.subheader("Laba Rugi")
+    pendapatan = statement_table(laba_rugi["pendapatan"], "Total Pendapatan", laba_rugi["total_pendapatan"])
+    beban = statement_table(laba_rugi["beban"], "Total Beban", laba_rugi["total_beban"])
+    st.metric("Laba Bersih", format_rupiah(laba_rugi["laba_bersih"]))
+    
+    st.markdown("---")
+    st.subheader(f"Neraca per {format_date([sampai]).iloc[0]}" if sampai else "Neraca")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Aset**")
+        aset = statement_table(neraca["aset"], "Total Aset", neraca["total_aset"])
+    with col2:
+        st.markdown("**Kewajiban**")
+        kewajiban = statement_table(neraca["kewajiban"], "Total Kewajiban", neraca["total_kewajiban"])
+        st.markdown("**Modal**")
+        modal = statement_table(neraca["modal"], "Total Modal", neraca["total_modal"])
+    
+    if neraca["seimbang"]:
+        st.success("✓ Aset = Kewajiban + Modal")
+    else:
+        st.error("⚠️ Neraca tidak seimbang!")
+    
+    export_buttons(
+        lambda: [pendapatan, beban, aset, kewajiban, modal],
+        "laporan_keuangan", "export_statements"
+    )
+
+def period_close_section():
+    """Close monthly periods (snapshot balances, lock their journal entries)"""
+    with st.expander("🔒 Tutup Periode"):
+        closed = get_closed_periods()
+        if closed:
+            st.caption(f"Periode tertutup sampai {closed[-1][0]} ({len(closed)} periode)")
+        
+        open_periods = get_open_periods()
+        if open_periods:
+            period = st.selectbox("Periode", open_periods, key="close_period")
+            if st.button("Tutup Periode", key="close_period_btn"):
+                success, msg = close_period(period)
+                if success:
+                    st.success(msg)
+                    st.rerun()
+                else:
+                    st.error(msg)
+        else:
+            st.info("Tidak ada periode yang bisa ditutup.")
+        
+        if closed and st.button("Buka Kembali Periode Terakhir", key="reopen_period_btn"):
+            success, msg = reopen_last_period()
+            if success:
+                st.success(msg)
+                st.rerun()
+            else:
+                st.error(msg)
+        
+        archived_through = get_archived_through()
+        if archived_through:
+            st.caption(f"Jurnal diarsip (Parquet) sampai {archived_through}")
+        if closed and closed[-1][0] != archived_through:
+            if st.button("Arsipkan Jurnal Periode Tertutup", key="archive_journal_btn"):
+                success, result = archive_closed_periods()
+                if success:
+                    st.success(f"{sum(rows for _, rows in result):,} entri jurnal dipindah ke arsip")
+                    st.rerun()
+                else:
+                    st.error(result)
 
 
 # APPLICATION ROUTERS
 def ecommerce_router():
     logo_path = os.path.join(os.path.dirname(__file__), "images", "logo.jpg")
     if os.path.exists(logo_path):
-        st.sidebar.image(logo_path, width=200)
+        st.sidebar.image(catalog_index.load_image(logo_path, thumbnails.LOGO_WIDTH), width=thumbnails.LOGO_WIDTH)
     else:
         st.sidebar.error("❌ Logo file not found!")
     st.sidebar.title(f"🛒 Ecommerce (Welcome {st.session_state.auth['username']})")
@@ -796,18 +914,18 @@ def ecommerce_router():
     if st.sidebar.button("Logout"):
         st.session_state.auth = {"authenticated": False}
         st.session_state.current_page = "🏡 Home"
-        st.session_state.cart = []
-        st.session_state.wishlist = []
+        st.session_state.cart = Cart()
+        st.session_state.wishlist = Wishlist()
         st.rerun()
 
 def inventory_router():
     logo_path = os.path.join(os.path.dirname(__file__), "images", "logo.jpg")
     if os.path.exists(logo_path):
-        st.sidebar.image(logo_path, width=200)
+        st.sidebar.image(catalog_index.load_image(logo_path, thumbnails.LOGO_WIDTH), width=thumbnails.LOGO_WIDTH)
     else:
         st.sidebar.error("❌ Logo file not found!")
     st.sidebar.title(f"📦 Inventory (Welcome {st.session_state.auth['username']})")
-    page = st.sidebar.radio("Menu", ["Inventory", "Jurnal Umum", "Buku Besar", "Neraca Saldo"], key="inv_radio")
+    page = st.sidebar.radio("Menu", ["Inventory", "Jurnal Umum", "Buku Besar", "Neraca Saldo", "Laporan Keuangan"], key="inv_radio")
     
     if st.sidebar.button("Logout"):
         st.session_state.auth = {"authenticated": False}
@@ -819,6 +937,8 @@ def inventory_router():
         jurnal_umum_page()
     elif page == "Buku Besar":
         buku_besar_page()
+    elif page == "Laporan Keuangan":
+        laporan_keuangan_page()
     else:
         neraca_saldo_page()
 
@@ -832,7 +952,7 @@ def main():
     )
     
     init_user_database()
-    create_table()
+    migrate()
     init_session_state()
     
     if not st.session_state.auth["authenticated"]:
@@ -0,0 +1,82 @@
+# archive.py
+# Arsip kolumnar jurnal: satu file Parquet per bulan di folder journal_archive
+# di samping file database. Modul ini hanya mengurus file; pemindahan baris dari
+# SQLite dan penggabungan dengan data live ada di db_manager.
+import glob
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # arsip opsional; tanpa pyarrow semua jurnal tetap di SQLite
+    pa = pq = None
+
+AVAILABLE = pq is not None
+ARCHIVE_DIRNAME = "journal_archive"
+COLUMNS = ["id", "tanggal", "akun_debit", "akun_kredit", "jumlah", "keterangan"]
+
+def archive_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIRNAME)
+
+def partition_path(db_path, month):
+    """Lokasi partisi bulan 'YYYY-MM': journal_archive/month=YYYY-MM/journal.parquet"""
+    return os.path.join(archive_dir(db_path), f"month={month}", "journal.parquet")
+
+def list_partitions(db_path):
+    """Bulan yang punya partisi arsip, terurut."""
+    pattern = os.path.join(archive_dir(db_path), "month=*", "journal.parquet")
+    return sorted(os.path.basename(os.path.dirname(p))[len("month="):] for p in glob.glob(pattern))
+
+def write_partition(db_path, month, frame):
+    """
+    Tulis DataFrame (kolom COLUMNS) sebagai partisi bulan itu. File ditulis ke
+    nama sementara lalu di-rename, jadi pembaca tidak pernah melihat file setengah jadi.
+    """
+    if not AVAILABLE:
+        raise RuntimeError("Arsip Parquet membutuhkan paket pyarrow")
+    path = partition_path(db_path, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    frame = frame[COLUMNS].astype({"id": "int64", "jumlah": "int64"})
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def remove_partition(db_path, month):
+    path = partition_path(db_path, month)
+    if os.path.exists(path):
+        os.remove(path)
+
+def read(db_path, months, columns=None, start=None, end=None, end_inclusive=True, akun=None):
+    """
+    Baca partisi bulan-bulan yang diminta sebagai satu DataFrame terurut (tanggal, id).
+    Hanya kolom yang diminta yang dibaca (column pruning), file di-memory-map, dan
+    filter tanggal [start, end] serta akun (debit atau kredit) didorong ke pembaca Parquet.
+    """
+    columns = list(columns or COLUMNS)
+    paths = [partition_path(db_path, m) for m in months]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths or not AVAILABLE:
+        return pd.DataFrame({c: pd.Series(dtype="object") for c in columns})
+
+    date_filters = []
+    if start:
+        date_filters.append(("tanggal", ">=", start))
+    if end:
+        date_filters.append(("tanggal", "<=" if end_inclusive else "<", end))
+    if akun is None:
+        filters = date_filters or None
+    else:
+        filters = [[("akun_debit", "==", akun)] + date_filters,
+                   [("akun_kredit", "==", akun)] + date_filters]
+
+    read_columns = list(dict.fromkeys(columns + ["tanggal", "id"]))
+    tables = [pq.read_table(p, columns=read_columns, filters=filters, memory_map=True) for p in paths]
+    frame = pa.concat_tables(tables).to_pandas()
+    if "jumlah" in frame:
+        # Partisi lama (sebelum Rupiah integer) menyimpan jumlah sebagai double
+        frame["jumlah"] = frame["jumlah"].round().astype("int64")
+    return frame.sort_values(["tanggal", "id"], kind="stable", ignore_index=True)[columns]
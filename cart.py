@@ -0,0 +1,99 @@
+# cart.py
+# Keranjang dan wishlist per sesi. Hanya id produk, jumlah, dan harga saat
+# ditambahkan (integer Rupiah) yang disimpan; nama, gambar, dan deskripsi dibaca
+# dari katalog bersama saat ditampilkan. Baris diindeks per id produk, jadi
+# tambah, cari, dan hapus O(1), dan total dijaga setiap kali isi berubah.
+from db_manager import to_rupiah
+
+class CartLine:
+    """Satu baris keranjang: produk, jumlah, dan harga satuan saat ditambahkan."""
+    __slots__ = ("product_id", "qty", "price")
+
+    def __init__(self, product_id, qty, price):
+        self.product_id = product_id
+        self.qty = qty
+        self.price = price
+
+    @property
+    def subtotal(self):
+        return self.qty * self.price
+
+class Cart:
+    """Baris keranjang per id produk dalam urutan ditambahkan, dengan total berjalan."""
+    __slots__ = ("_lines", "_total")
+
+    def __init__(self):
+        self._lines = {}
+        self._total = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(tuple(self._lines.values()))
+
+    def __contains__(self, product_id):
+        return product_id in self._lines
+
+    def get(self, product_id):
+        return self._lines.get(product_id)
+
+    @property
+    def total(self):
+        return self._total
+
+    def add(self, product_id, qty, price):
+        """
+        Tambah qty produk. Produk yang sudah ada di keranjang hanya bertambah
+        jumlahnya dan tetap memakai harga saat pertama kali ditambahkan.
+        """
+        line = self._lines.get(product_id)
+        if line is None:
+            line = self._lines[product_id] = CartLine(product_id, 0, to_rupiah(price))
+        line.qty += qty
+        self._total += qty * line.price
+        return line
+
+    def remove(self, product_id):
+        line = self._lines.pop(product_id, None)
+        if line is not None:
+            self._total -= line.subtotal
+        return line
+
+    def clear(self):
+        self._lines.clear()
+        self._total = 0
+
+class Wishlist:
+    """Id produk (dengan harga saat ditambahkan) dalam urutan ditambahkan."""
+    __slots__ = ("_prices",)
+
+    def __init__(self):
+        self._prices = {}
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __iter__(self):
+        return iter(tuple(self._prices.items()))
+
+    def __contains__(self, product_id):
+        return product_id in self._prices
+
+    def add(self, product_id, price):
+        """False jika produk sudah ada di wishlist."""
+        if product_id in self._prices:
+            return False
+        self._prices[product_id] = to_rupiah(price)
+        return True
+
+    def remove(self, product_id):
+        return self._prices.pop(product_id, None) is not None
+
+    def move_to_cart(self, product_id, qty, cart):
+        """Pindahkan produk ke keranjang dengan harga yang tersimpan di wishlist."""
+        price = self._prices.pop(product_id)
+        return cart.add(product_id, qty, price)
+
+    def clear(self):
+        self._prices.clear()
@@ -0,0 +1,173 @@
+# catalog.py
+# Katalog toko di memori: dimuat sekali per proses dari tabel products dan hanya
+# dimuat ulang saat catalog_version berubah. Indeks per id dan nama, kelompok per
+# kategori, dan urutan harga yang sudah tersusun membuat filter, urutan, dan
+# rentang harga tidak perlu memindai seluruh katalog di setiap rerun.
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import db_manager as db
+import thumbnails
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+ALL = "All"
+SORTS = ("price_asc", "price_desc", "rating", "newest")
+PAGE_SIZES = (6, 12, 24, 48)
+DEFAULT_PAGE_SIZE = 12
+IMAGE_CACHE_SIZE = 256  # file gambar yang disimpan di memori (kira-kira 2 halaman terbesar x 2 sesi)
+
+def _image_path(image):
+    if not image or "://" in image or os.path.isabs(image):
+        return image
+    return os.path.join(IMAGES_DIR, image)
+
+def _product(row):
+    product_id, name, price, category, description, image, rating, featured, in_stock = row
+    product = {
+        "id": product_id,
+        "name": name,
+        "price": price,
+        "image": _image_path(image),
+        "description": description,
+        "category": category,
+        "featured": bool(featured),
+        "in stock": bool(in_stock),
+    }
+    if rating is not None:
+        product["rating"] = rating
+    return product
+
+class _Bucket:
+    """Produk satu kategori (atau semua) dalam urutan yang sudah tersusun."""
+    __slots__ = ("by_price", "prices", "by_rating", "newest")
+
+    def __init__(self, products):
+        self.by_price = tuple(sorted(products, key=lambda p: (p["price"], p["id"])))
+        self.prices = [p["price"] for p in self.by_price]
+        self.by_rating = tuple(sorted(products, key=lambda p: (-p.get("rating", 0), p["id"])))
+        self.newest = tuple(sorted(products, key=lambda p: -p["id"]))
+
+    def price_slice(self, min_price, max_price):
+        """Produk dengan min_price <= harga <= max_price, termurah dulu (dua kali bisect)."""
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        return self.by_price[lo:hi]
+
+class Catalog:
+    """
+    Snapshot katalog yang tidak berubah setelah dibuat. Produk berupa dict
+    (kunci yang sama dengan products.py ditambah id) dan dipakai bersama
+    semua sesi, jadi pemanggil tidak boleh mengubahnya.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.products = tuple(_product(row) for row in rows)
+        self.by_id = {p["id"]: p for p in self.products}
+        self.by_name = {p["name"]: p for p in self.products}
+
+        grouped = {}
+        for p in self.products:
+            grouped.setdefault(p["category"], []).append(p)
+        self.categories = tuple(sorted(grouped))
+        self._buckets = {category: _Bucket(items) for category, items in grouped.items()}
+        self._buckets[ALL] = _Bucket(self.products)
+
+    def __len__(self):
+        return len(self.products)
+
+    def get(self, product_id):
+        return self.by_id.get(product_id)
+
+    def find(self, name):
+        return self.by_name.get(name)
+
+    def query(self, category=ALL, sort="price_asc", min_price=None, max_price=None):
+        """
+        Produk satu kategori (ALL untuk semua) dalam rentang harga, dengan urutan
+        salah satu SORTS. Urutan harga langsung berupa irisan hasil bisect; urutan
+        lain hanya memeriksa harga produk di kategori itu.
+        """
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            return ()
+        if sort == "price_asc":
+            return bucket.price_slice(min_price, max_price)
+        if sort == "price_desc":
+            return bucket.price_slice(min_price, max_price)[::-1]
+
+        ordered = bucket.by_rating if sort == "rating" else bucket.newest
+        if min_price is None and max_price is None:
+            return ordered
+        lo = float("-inf") if min_price is None else min_price
+        hi = float("inf") if max_price is None else max_price
+        return tuple(p for p in ordered if lo <= p["price"] <= hi)
+
+    def price_bounds(self, category=ALL):
+        """(harga termurah, harga termahal) di kategori itu, atau (0, 0) jika kosong."""
+        bucket = self._buckets.get(category)
+        if bucket is None or not bucket.prices:
+            return 0, 0
+        return bucket.prices[0], bucket.prices[-1]
+
+def page_count(total, size):
+    """Jumlah halaman untuk total produk; minimal 1 agar halaman kosong tetap bisa ditampilkan."""
+    return max(1, -(-total // size))
+
+def page(products, number, size):
+    """Produk di halaman ke-number (mulai 1) dengan size produk per halaman."""
+    start = (number - 1) * size
+    return products[start:start + size]
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _read_image(path, mtime):
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_image(image, width=None):
+    """
+    Isi file gambar produk (varian thumbnail untuk lebar tampilan width, jika
+    diisi) sebagai bytes dari cache LRU (kunci: path dan mtime, jadi file yang
+    diganti ikut terbaca ulang). URL dan file yang tidak ada dikembalikan apa
+    adanya untuk st.image.
+    """
+    if not image or "://" in image:
+        return image
+    if width is not None:
+        image = thumbnails.thumbnail(image, width)
+    try:
+        return _read_image(image, os.stat(image).st_mtime_ns)
+    except OSError:
+        return image
+
+_prefetch_executor = ThreadPoolExecutor(1, thread_name_prefix="catalog-prefetch")
+
+def prefetch_images(products, width=None):
+    """Siapkan gambar produk di cache dari thread latar belakang (misalnya halaman berikutnya)."""
+    images = [p["image"] for p in products]
+    return _prefetch_executor.submit(lambda: [load_image(image, width) for image in images])
+
+_catalog = None
+_checked = None
+_lock = threading.Lock()
+
+def get_catalog():
+    """
+    Katalog bersama untuk proses ini. Versi katalog hanya dibaca ulang saat isi
+    database berubah (db.change_token), dan katalog dibangun ulang hanya saat
+    catalog_version berbeda.
+    """
+    global _catalog, _checked
+    token = (db.DB_PATH, db.change_token())
+    if _catalog is not None and _checked == token:
+        return _catalog
+    with _lock:
+        if _catalog is None or _checked != token:
+            version = (db.DB_PATH, db.get_catalog_version())
+            if _catalog is None or _catalog.version != version:
+                _catalog = Catalog(db.get_products(), version)
+            _checked = token
+        return _catalog
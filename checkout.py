@@ -2,6 +2,9 @@ import streamlit as st
 import time
 from datetime import datetime
 import random
+from catalog import get_catalog
+from db_manager import decrease_cart_stock, get_tracked_item_names
+from utils import format_rupiah
 
 
 def generate_order_id():
@@ -11,15 +14,15 @@ def generate_order_id():
 def show_checkout_form():
     st.title("🛒 Proses Checkout")
     
-    # Ambil daftar item di cart (yang sudah berisi 'name', 'price', dan 'qty')
-    cart_items = st.session_state.get("cart", [])
+    # Baris cart berisi id produk, qty, dan harga saat ditambahkan (integer Rupiah)
+    cart = st.session_state.get("cart")
     
-    if not cart_items:
+    if not cart:
         st.write("Keranjang belanja Anda kosong. Tambahkan produk terlebih dahulu!")
         return
     
-    # Hitung subtotal dengan menghitung setiap item: qty × price
-    subtotal = sum(item["price"] * item.get("qty", 1) for item in cart_items)
+    # Subtotal sudah dijaga Cart saat isi keranjang berubah (integer Rupiah, eksak)
+    subtotal = cart.total
     # Ongkos kirim: gratis jika subtotal >= 200.000, else 15.000
     shipping_cost = 0 if subtotal >= 200000 else 15000
     total = subtotal + shipping_cost
@@ -60,27 +63,25 @@ def show_checkout_form():
         st.header("🛍️ Ringkasan Pesanan")
         
         # Daftar produk di cart: tampilkan name, price, qty, subtotal
-        for item in cart_items:
-            name = item.get("name", "-")
-            price = item.get("price", 0)
-            qty = item.get("qty", 1)
-            subtotal_item = price * qty
+        catalog = get_catalog()
+        for line in cart:
+            product = catalog.get(line.product_id)
 
-            st.markdown(f"**{name}**")
-            st.write(f"• Harga Satuan: Rp {price:,.2f}")
-            st.write(f"• Jumlah: {qty}")
-            st.write(f"• Subtotal Item: Rp {subtotal_item:,.2f}")
+            st.markdown(f"**{product['name'] if product else '-'}**")
+            st.write(f"• Harga Satuan: {format_rupiah(line.price)}")
+            st.write(f"• Jumlah: {line.qty}")
+            st.write(f"• Subtotal Item: {format_rupiah(line.subtotal)}")
             st.markdown("---")
 
         # Ringkasan pembayaran
         st.markdown("<p class='big-font'>Ringkasan Pembayaran</p>", unsafe_allow_html=True)
-        st.write(f"Subtotal Semua Item: Rp {subtotal:,.2f}")
+        st.write(f"Subtotal Semua Item: {format_rupiah(subtotal)}")
         
-        shipping_text = "Gratis" if shipping_cost == 0 else f"Rp {shipping_cost:,.2f}"
+        shipping_text = "Gratis" if shipping_cost == 0 else format_rupiah(shipping_cost)
         st.write(f"Biaya Pengiriman: {shipping_text}")
         
         st.markdown("---")
-        st.markdown(f"### 💰 Total Pembayaran: Rp {total:,.2f}")
+        st.markdown(f"### 💰 Total Pembayaran: {format_rupiah(total)}")
         
         # Pilihan metode pembayaran
         st.markdown("<p class='big-font'>Metode Pembayaran</p>", unsafe_allow_html=True)
@@ -120,6 +121,21 @@ def process_payment(amount, method):
     with st.spinner("Memproses pembayaran Anda..."):
         time.sleep(2)  # simulasi delay
         
+        # Kurangi stok semua item di cart sekaligus; gagal semua jika ada yang kurang
+        catalog = get_catalog()
+        products = [(catalog.get(line.product_id), line.qty) for line in st.session_state.cart]
+        if any(product is None for product, _ in products):
+            st.error("❌ Pembayaran dibatalkan. Ada produk di keranjang yang sudah tidak tersedia.")
+            return
+        # Hanya produk yang stoknya dilacak di inventory yang dikurangi; produk
+        # katalog tanpa baris inventory tetap bisa dibeli
+        tracked = get_tracked_item_names(product["name"] for product, _ in products)
+        cart_lines = [(product["name"], qty) for product, qty in products if product["name"] in tracked]
+        success, msg = decrease_cart_stock(cart_lines)
+        if not success:
+            st.error(f"❌ Pembayaran dibatalkan. {msg}")
+            return
+        
         # Generate order ID
         order_id = generate_order_id()
         
@@ -1,69 +1,252 @@
+import csv
+import itertools
+import re
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import pandas as pd
+import archive
 import db_manager as db
 import os
 
-DB_FILE = os.path.join(os.path.dirname(__file__), "..", "inventory.db")
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory.db")  # Nama file database SQLite
+DB_FILE = DB_PATH
 
-def get_connection():
-    return sqlite3.connect(DB_FILE)
+# Pengaturan yang dipasang sekali per koneksi
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+MAX_IDLE_CONNECTIONS = 8
+
+
+class _PooledConnection:
+    """Pemegang koneksi milik satu thread; dikembalikan ke pool saat thread selesai."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 0
+        self.changes = 0
+
+
+class ConnectionManager:
+    """
+    Pool koneksi SQLite per-thread.
+    Setiap thread memakai satu koneksi yang tetap hidup dan dipakai ulang.
+    Saat thread selesai (misalnya thread rerun Streamlit), koneksinya
+    dikembalikan ke daftar idle untuk dipakai thread berikutnya.
+    """
+
+    def __init__(self, path, max_idle=MAX_IDLE_CONNECTIONS):
+        self.path = path
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stats = {"opened": 0, "reused": 0, "recycled": 0, "closed": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        return conn
+
+    def _holder(self):
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            with self._lock:
+                self._stats["reused"] += 1
+            return holder
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._stats["recycled" if conn is not None else "opened"] += 1
+        if conn is None:
+            conn = self._open()
+
+        holder = _PooledConnection(conn)
+        weakref.finalize(holder, self._release, conn)
+        self._local.holder = holder
+        return holder
+
+    def acquire(self):
+        """Koneksi milik thread ini (dibuka sekali, lalu dipakai ulang)."""
+        return self._holder().conn
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        holder = self._holder()
+        conn = holder.conn
+        if holder.depth == 0:
+            holder.changes = conn.total_changes
+            if immediate and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+        holder.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            holder.depth -= 1
+            if holder.depth == 0:
+                conn.rollback()
+            raise
+        holder.depth -= 1
+        if holder.depth == 0:
+            conn.commit()
+            if conn.total_changes != holder.changes:
+                _notify_write()
 
-DB_PATH = "inventory.db"  # Nama file database SQLite
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._stats["closed"] += 1
+        conn.close()
+
+    def change_token(self):
+        """
+        PRAGMA data_version dari satu koneksi pengamat khusus. Nilainya berubah
+        setiap ada commit dari koneksi lain: koneksi pool ini maupun proses lain.
+        """
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = self._open()
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats["closed"] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        return stats
+
+
+# Callback tanpa argumen yang dipanggil setelah setiap transaksi tulis yang
+# mengubah data (misalnya untuk menjadwalkan hitung ulang laporan)
+_write_listeners = []
+
+def add_write_listener(callback):
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+def _notify_write():
+    for callback in list(_write_listeners):
+        callback()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None or _manager.path != DB_PATH:
+            if _manager is not None:
+                _manager.close_idle()
+            _manager = ConnectionManager(DB_PATH)
+        return _manager
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def create_table():
-    """
-    Membuat tabel: items (untuk inventory)
-                  journal (untuk Jurnal Umum)
-    jika belum ada.
-    """
-    conn = get_conn()
-    c = conn.cursor()
-    
-def create_table():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Tabel items
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS items (
-            kode TEXT PRIMARY KEY,
-            nama TEXT,
-            stok INTEGER,
-            harga REAL
-        )
-    """)
-
-    # Tabel jurnal_umum
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS jurnal_umum (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tanggal TEXT,
-            akun_debit TEXT,
-            akun_kredit TEXT,
-            jumlah REAL,
-            keterangan TEXT
-        )
-    """)
+    """Koneksi SQLite pool milik thread ini. Jangan ditutup oleh pemanggil."""
+    return get_manager().acquire()
+
+def get_connection():
+    return get_conn()
 
-    conn.commit()
-    conn.close()
+def transaction(immediate=False):
+    """
+    Context manager untuk operasi tulis: commit sekali di akhir,
+    rollback jika terjadi error. Boleh bersarang; hanya blok terluar yang commit.
+    immediate=True mengambil kunci tulis di awal (BEGIN IMMEDIATE).
+    """
+    return get_manager().transaction(immediate)
+
+def change_token():
+    """Token yang berubah setiap kali isi database berubah; dipakai sebagai kunci cache baca."""
+    return get_manager().change_token()
+
+def connection_stats():
+    """
+    Counter pool koneksi: opened (koneksi baru), reused (dipakai ulang dalam thread),
+    recycled (diambil dari idle milik thread yang sudah selesai), closed, idle.
+    """
+    return get_manager().stats()
+
+# Pembacaan bertahap (streaming)
+STREAM_CHUNK_SIZE = 10000
+
+def _iter_query(sql, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Yield baris (tuple) dari cursor yang hidup, diambil per chunk dengan fetchmany."""
+    cursor = get_conn().execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for r in rows:
+                yield tuple(r)
+    finally:
+        cursor.close()
+
+def _iter_frames(sql, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Yield DataFrame berukuran paling banyak chunk_size baris."""
+    yield from pd.read_sql(sql, get_conn(), params=params, chunksize=chunk_size)
+
+# Uang disimpan sebagai INTEGER Rupiah penuh (64-bit) di semua tabel
+def to_rupiah(value):
+    """
+    Nilai uang (int, float, Decimal atau teks) -> int Rupiah, dibulatkan setengah ke atas.
+    Nilai yang bukan angka ("abc", "", "1,5", NaN) memberi ValueError.
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        return int(Decimal(str(value).strip()).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Nilai uang tidak valid: {value!r}") from None
+
+ITEMS_SQL = "SELECT kode, name AS nama, stock AS stok, price AS harga FROM inventory ORDER BY id"
+
+def iter_items(chunk_size=STREAM_CHUNK_SIZE):
+    """Yield barang satu per satu: (kode, nama, stok, harga)."""
+    return _iter_query(ITEMS_SQL, chunk_size=chunk_size)
+
+def iter_item_frames(chunk_size=STREAM_CHUNK_SIZE):
+    """Yield DataFrame barang (kolom: id, kode, nama, stok, harga) per chunk."""
+    return _iter_frames(
+        "SELECT id, kode, name AS nama, stock AS stok, price AS harga FROM inventory ORDER BY id",
+        chunk_size=chunk_size
+    )
 
 def get_all_items():
     """
-    Mengambil semua baris dari tabel items.
+    Mengambil semua barang dari tabel inventory.
     Mengembalikan list of tuples: (kode, nama, stok, harga)
     """
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT kode, nama, stok, harga FROM items")
-    rows = c.fetchall()
-    conn.close()
-    return [(r["kode"], r["nama"], r["stok"], r["harga"]) for r in rows]
+    return list(iter_items())
+
+UPSERT_ITEM_SQL = """
+    INSERT INTO inventory (kode, name, stock, price)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(kode) DO UPDATE SET
+        name = excluded.name,
+        stock = inventory.stock + excluded.stock,
+        price = excluded.price
+"""
 
 def add_item(kode, nama, stok, harga):
     """
@@ -71,163 +254,1043 @@ def add_item(kode, nama, stok, harga):
     Jika sudah ada, update stok dengan menambahkan stok baru, serta update harga.
     """
     try:
-        conn = get_conn()
-        c = conn.cursor()
-        c.execute("SELECT stok FROM items WHERE kode = ?", (kode,))
-        existing = c.fetchone()
-        if existing:
-            new_stok = existing["stok"] + stok
-            c.execute("""
-                UPDATE items 
-                SET nama = ?, stok = ?, harga = ?
-                WHERE kode = ?
-            """, (nama, new_stok, harga, kode))
-        else:
-            c.execute("""
-                INSERT INTO items (kode, nama, stok, harga)
-                VALUES (?, ?, ?, ?)
-            """, (kode, nama, stok, harga))
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            conn.execute(UPSERT_ITEM_SQL, (kode, nama, stok, to_rupiah(harga)))
         return True, ""
-    except sqlite3.Error as e:
+    except (sqlite3.Error, ValueError) as e:
         return False, str(e)
 
 def decrease_item_stock(kode, qty):
     """
     Kurangi stok barang. Jika kode tidak ditemukan atau stok tidak cukup,
     maka return False dengan pesan.
+    Pengecekan dan pengurangan dilakukan dalam satu UPDATE bersyarat,
+    sehingga dua sesi yang bersamaan tidak bisa menjual melebihi stok.
     """
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT stok FROM items WHERE kode = ?", (kode,))
-    row = c.fetchone()
+    with transaction() as conn:
+        c = conn.execute("UPDATE inventory SET stock = stock - ? WHERE kode = ? AND stock >= ?", (qty, kode, qty))
+        if c.rowcount == 1:
+            return True, ""
+        row = conn.execute("SELECT stock FROM inventory WHERE kode = ?", (kode,)).fetchone()
     if not row:
-        conn.close()
         return False, "Kode barang tidak ditemukan."
-    current = row["stok"]
-    if current < qty:
-        conn.close()
-        return False, f"Stok tidak mencukupi (tersedia: {current})."
-    new_stok = current - qty
-    c.execute("UPDATE items SET stok = ? WHERE kode = ?", (new_stok, kode))
-    conn.commit()
-    conn.close()
+    return False, f"Stok tidak mencukupi (tersedia: {row['stock']})."
+
+class InsufficientStockError(Exception):
+    """Dipakai untuk membatalkan transaksi pengurangan stok keranjang."""
+
+def _describe_shortage(conn, totals):
+    names = list(totals)
+    placeholders = ", ".join("?" * len(names))
+    stock = {r["name"]: r["stock"] for r in conn.execute(
+        f"SELECT name, stock FROM inventory WHERE name IN ({placeholders})", names)}
+    problems = []
+    for name, qty in totals.items():
+        if name not in stock:
+            problems.append(f"{name} tidak ditemukan")
+        elif stock[name] < qty:
+            problems.append(f"{name} (tersedia: {stock[name]}, diminta: {qty})")
+    return "Stok tidak mencukupi: " + ", ".join(problems)
+
+def _tracked_item_names(conn, names):
+    names = list(names)
+    placeholders = ", ".join("?" * len(names))
+    return {r["name"] for r in conn.execute(
+        f"SELECT name FROM inventory WHERE name IN ({placeholders})", names)}
+
+def get_tracked_item_names(names):
+    """
+    Nama-nama yang punya baris inventory (stoknya dilacak). Produk katalog lain,
+    misalnya yang hanya dijual tanpa pencatatan stok, tidak termasuk.
+    """
+    names = list(names)
+    if not names:
+        return set()
+    return _tracked_item_names(get_conn(), names)
+
+def decrease_cart_stock(lines):
+    """
+    Kurangi stok semua baris keranjang dalam satu transaksi (all-or-nothing).
+    lines: iterable of (nama_barang, qty); qty untuk nama yang sama dijumlahkan.
+    Jika ada nama yang tidak ada di inventory atau satu baris yang stoknya kurang,
+    tidak ada stok yang berubah. Return (True, "") atau (False, pesan).
+    """
+    totals = {}
+    for name, qty in lines:
+        totals[name] = totals.get(name, 0) + qty
+    if not totals:
+        return True, ""
+
+    try:
+        with transaction(immediate=True) as conn:
+            tracked = _tracked_item_names(conn, totals)
+            missing = [name for name in totals if name not in tracked]
+            if missing:
+                return False, f"Produk tidak ditemukan: {', '.join(missing)}"
+            c = conn.executemany(
+                "UPDATE inventory SET stock = stock - ? WHERE name = ? AND stock >= ?",
+                [(qty, name, qty) for name, qty in totals.items()]
+            )
+            if c.rowcount != len(totals):
+                raise InsufficientStockError(_describe_shortage(conn, totals))
+    except InsufficientStockError as e:
+        return False, str(e)
+    except sqlite3.Error as e:
+        return False, str(e)
     return True, ""
 
+# Riwayat stok: stock_movements diisi trigger pada setiap perubahan inventory.stock,
+# jadi semua jalur tulis (add_item, decrease_item_stock, keranjang, bulk) tercatat.
+STOCK_CHECKPOINT_INTERVAL = 256
+STOCK_TIMESTAMP_SQL = "strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')"
+
+# Checkpoint terakhir per barang sampai :as_of, ditambah paling banyak
+# STOCK_CHECKPOINT_INTERVAL pergerakan sesudahnya (checkpoint berikutnya sudah lewat :as_of)
+STOCK_AS_OF_SQL = f"""
+    WITH latest AS (
+        SELECT i.id, i.kode, i.name,
+               (SELECT c.seq FROM stock_checkpoints c
+                WHERE c.item_id = i.id AND c.moved_at <= :as_of
+                ORDER BY c.moved_at DESC, c.seq DESC LIMIT 1) AS seq
+        FROM inventory i
+        WHERE EXISTS (SELECT 1 FROM stock_movements m
+                      WHERE m.item_id = i.id AND m.seq = 1 AND m.moved_at <= :as_of)
+    )
+    SELECT l.kode, l.name AS nama,
+           COALESCE(c.stock, 0) + COALESCE((
+               SELECT SUM(m.qty) FROM stock_movements m
+               WHERE m.item_id = l.id
+                 AND m.seq > COALESCE(l.seq, 0)
+                 AND m.seq < COALESCE(l.seq, 0) + {STOCK_CHECKPOINT_INTERVAL}
+                 AND m.moved_at <= :as_of
+           ), 0) AS stok
+    FROM latest l
+    LEFT JOIN stock_checkpoints c ON c.item_id = l.id AND c.seq = l.seq
+    ORDER BY l.id
+"""
+
+def _stock_timestamp(as_of):
+    """Tanggal 'YYYY-MM-DD' berarti akhir hari itu; waktu lengkap dipakai apa adanya."""
+    return f"{as_of} 23:59:59" if len(as_of) == 10 else as_of
+
+def get_stock_as_of(as_of):
+    """
+    Stok setiap barang pada as_of ('YYYY-MM-DD' atau 'YYYY-MM-DD HH:MM:SS'), dari
+    checkpoint terdekat ditambah pergerakan sesudahnya. Barang yang belum punya
+    pergerakan pada saat itu tidak ikut.
+    Mengembalikan list of tuples: (kode, nama, stok).
+    """
+    conn = get_conn()
+    rows = conn.execute(STOCK_AS_OF_SQL, {"as_of": _stock_timestamp(as_of)}).fetchall()
+    return [tuple(r) for r in rows]
+
+def get_stock_movements(nama, limit=100):
+    """
+    Pergerakan stok terbaru satu barang: list of tuples (waktu, qty, stok_setelah),
+    terbaru dulu. stok_setelah dihitung mundur dari stok saat ini.
+    """
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT moved_at, qty,
+               stock - COALESCE(SUM(qty) OVER (ORDER BY seq DESC
+                                               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0)
+        FROM (
+            SELECT m.seq, m.moved_at, m.qty, i.stock
+            FROM stock_movements m JOIN inventory i ON i.id = m.item_id
+            WHERE i.name = ?
+            ORDER BY m.seq DESC
+            LIMIT ?
+        )
+        ORDER BY seq DESC
+    """, (nama, limit)).fetchall()
+    return [tuple(r) for r in rows]
+
+# Nilai persediaan FIFO dan HPP kumulatif dijaga trigger di stock_valuation,
+# jadi laporan hanya membaca satu baris per barang
+VALUATION_SQL = """
+    SELECT i.id, i.kode, i.name AS nama, i.stock AS stok, i.price AS harga,
+           COALESCE(v.value, 0) AS nilai, COALESCE(v.cogs, 0) AS hpp
+    FROM inventory i
+    LEFT JOIN stock_valuation v ON v.item_id = i.id
+    ORDER BY i.id
+"""
+
+def iter_valuation_frames(chunk_size=STREAM_CHUNK_SIZE):
+    """Yield DataFrame (kolom: id, kode, nama, stok, harga, nilai, hpp) per chunk."""
+    return _iter_frames(VALUATION_SQL, chunk_size=chunk_size)
+
+def get_inventory_valuation():
+    """
+    Nilai persediaan FIFO per barang.
+    Mengembalikan list of tuples: (kode, nama, stok, nilai_fifo, hpp_kumulatif).
+    """
+    conn = get_conn()
+    return [(r["kode"], r["nama"], r["stok"], r["nilai"], r["hpp"]) for r in conn.execute(VALUATION_SQL)]
+
+# Katalog toko
+def get_catalog_version():
+    """Versi katalog; naik setiap ada perubahan di tabel products."""
+    return get_conn().execute("SELECT version FROM catalog_version").fetchone()[0]
+
+def get_products():
+    """
+    Semua produk katalog, terurut id.
+    Mengembalikan list of tuples: (id, nama, harga, kategori, deskripsi, gambar, rating, featured, tersedia).
+    """
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT id, name, price, category, description, image, rating, featured, in_stock
+        FROM products ORDER BY id
+    """).fetchall()
+    return [tuple(r) for r in rows]
+
+SEARCH_LIMIT = 50
+# Kecocokan terbaik (menurut BM25) yang disaring ulang dengan kategori persis per
+# tahap pencarian; pengurutan top-N memakai memori sebesar batas ini, bukan katalog
+SEARCH_CANDIDATES = 1000
+
+# Bobot BM25 per kolom products_fts: nama, deskripsi, kategori. Kandidat dibatasi
+# sesudah diurutkan skor, jadi yang terpotong hanya kecocokan dengan skor terburuk
+# FTS5 tetap menilai setiap baris yang cocok sebelum LIMIT (BM25 tanpa penghentian
+# dini), jadi waktu pencarian sebanding dengan jumlah kecocokan, bukan ukuran
+# katalog. ORDER BY rank di dalam FTS5 menghindari sort tapi terukur lebih lambat.
+SEARCH_SQL = """
+    SELECT p.id
+    FROM (
+        SELECT rowid, bm25(products_fts, 10.0, 1.0, 2.0) AS score
+        FROM products_fts
+        WHERE products_fts MATCH :query
+        ORDER BY score, rowid
+        LIMIT :candidates
+    ) f
+    JOIN products p ON p.id = f.rowid
+    WHERE :category IS NULL OR p.category = :category
+    ORDER BY f.score, p.id
+    LIMIT :limit
+"""
+
+SEARCH_LIKE_SQL = """
+    SELECT id FROM products
+    WHERE (name LIKE :pattern ESCAPE '\\' OR description LIKE :pattern ESCAPE '\\')
+      AND (:category IS NULL OR category = :category)
+    ORDER BY name LIKE :pattern ESCAPE '\\' DESC, id
+    LIMIT :limit
+"""
+
+def _fts_query(text):
+    """Teks bebas -> query FTS5: setiap kata wajib ada dan cocok sebagai awalan kata."""
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+def search_products(text, category=None, limit=SEARCH_LIMIT):
+    """
+    Cari produk di katalog berdasarkan nama, deskripsi dan kategori; setiap kata
+    cocok sebagai awalan ("cabe raw" menemukan "Cabe Rawit"). category=None untuk
+    semua kategori. Mengembalikan paling banyak limit id produk, paling relevan dulu.
+    """
+    words = _fts_query(text or "")
+    if not words:
+        return []
+    conn = get_conn()
+    category_filter = ""
+    if category is not None:
+        category_filter = ' AND category : "{}"'.format(category.replace('"', '""'))
+    # Tahap 1 hanya kolom nama (kecocokan paling kuat), tahap 2 semua kolom untuk sisanya
+    ids = []
+    try:
+        for query in (f"name : ({words}){category_filter}", f"({words}){category_filter}"):
+            rows = conn.execute(SEARCH_SQL, {
+                "query": query, "category": category, "candidates": SEARCH_CANDIDATES, "limit": limit,
+            }).fetchall()
+            ids.extend(r[0] for r in rows if r[0] not in ids)
+            if len(ids) >= limit:
+                break
+    except sqlite3.OperationalError:
+        # Tanpa indeks FTS5 (SQLite tanpa modul fts5): cocokkan seluruh frasa dengan LIKE
+        escaped = re.sub(r"([\\%_])", r"\\\1", text.strip())
+        rows = conn.execute(SEARCH_LIKE_SQL, {"pattern": f"%{escaped}%", "category": category, "limit": limit}).fetchall()
+        ids = [r[0] for r in rows]
+    return ids[:limit]
+
+# Tanggal disimpan sebagai teks ISO 'YYYY-MM-DD', jadi urutan teks = urutan tanggal
+# dan rentang tanggal bisa dicari langsung di indeks (date, id).
+MIN_DATE = ""
+MAX_DATE = "9999-12-31"
+
+def _date_range(dari=None, sampai=None):
+    """Parameter :dari/:sampai (inklusif); None berarti tanpa batas."""
+    return {"dari": dari or MIN_DATE, "sampai": sampai or MAX_DATE}
+
+# Arsip Parquet: bulan dalam periode yang sudah diarsip tidak lagi ada di tabel
+# journal. Semua tanggal arsip lebih lama dari baris live, jadi pembacaan cukup
+# menyambung arsip lalu SQLite.
+def get_archived_through(conn=None):
+    """Periode terakhir yang sudah dipindah ke arsip Parquet ('YYYY-MM'), atau None."""
+    conn = conn or get_conn()
+    return conn.execute("SELECT MAX(period) FROM archived_periods").fetchone()[0]
+
+def _archive_end(conn=None):
+    """Tanggal pertama yang masih ada di SQLite ('' jika belum ada arsip)."""
+    return _next_month_start(get_archived_through(conn))
+
+def _archived_months(dari=None, sampai=None):
+    """Partisi arsip yang beririsan dengan rentang tanggal."""
+    through = get_archived_through()
+    if through is None:
+        return []
+    first, last = (dari or MIN_DATE)[:7], min((sampai or MAX_DATE)[:7], through)
+    return [m for m in archive.list_partitions(DB_PATH) if first <= m <= last]
+
+def _iter_archived_frames(dari=None, sampai=None, chunk_size=STREAM_CHUNK_SIZE):
+    for month in _archived_months(dari, sampai):
+        frame = archive.read(DB_PATH, [month], start=dari, end=sampai)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size].reset_index(drop=True)
+
+JOURNAL_SQL = """
+    SELECT j.id, j.date AS tanggal, d.name AS akun_debit, k.name AS akun_kredit,
+           j.amount AS jumlah, j.description AS keterangan
+    FROM journal j
+    JOIN accounts d ON d.id = j.debit_account_id
+    JOIN accounts k ON k.id = j.credit_account_id
+    WHERE j.date BETWEEN :dari AND :sampai
+    ORDER BY j.date ASC, j.id ASC
+"""
+
+def iter_journal_entries(chunk_size=STREAM_CHUNK_SIZE, dari=None, sampai=None):
+    """Yield entri jurnal (arsip lalu live) satu per satu: (id, tanggal, akun_debit, akun_kredit, jumlah, keterangan)."""
+    for frame in _iter_archived_frames(dari, sampai, chunk_size):
+        yield from map(tuple, frame.astype(object).to_numpy())
+    yield from _iter_query(JOURNAL_SQL, _date_range(dari, sampai), chunk_size=chunk_size)
+
+def iter_journal_frames(chunk_size=STREAM_CHUNK_SIZE, dari=None, sampai=None):
+    """
+    Yield DataFrame jurnal per chunk (kolom: id, tanggal, akun_debit,
+    akun_kredit, jumlah, keterangan), terurut tanggal lalu id.
+    dari/sampai ('YYYY-MM-DD', inklusif) membatasi rentang tanggal lewat idx_journal_date;
+    bulan yang sudah diarsip dibaca dari partisi Parquet-nya.
+    """
+    yield from _iter_archived_frames(dari, sampai, chunk_size)
+    yield from _iter_frames(JOURNAL_SQL, _date_range(dari, sampai), chunk_size=chunk_size)
+
 def get_all_journal_entries():
     """
     Mengambil semua entri jurnal dari tabel journal, diurutkan dari tanggal asc.
     Mengembalikan list of tuples: (id, tanggal, akun_debit, akun_kredit, jumlah, keterangan)
     """
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT id, tanggal, akun_debit, akun_kredit, jumlah, keterangan FROM journal ORDER BY tanggal ASC, id ASC")
-    rows = c.fetchall()
-    conn.close()
-    return [(r["id"], r["tanggal"], r["akun_debit"], r["akun_kredit"], r["jumlah"], r["keterangan"]) for r in rows]
+    return list(iter_journal_entries())
+
+# Akun ditulis dengan nama dan disimpan sebagai id bagan akun; nama yang tidak
+# ada di bagan akun menghasilkan NULL dan ditolak oleh NOT NULL.
+JOURNAL_INSERT_SQL = """
+    INSERT INTO journal (date, debit_account_id, credit_account_id, amount, description)
+    VALUES (?, (SELECT id FROM accounts WHERE name = ?), (SELECT id FROM accounts WHERE name = ?), ?, ?)
+"""
 
 def add_journal_entry(tanggal, akun_debit, akun_kredit, jumlah, keterangan):
     """
-    Menambahkan entri baru ke tabel journal.
+    Menambahkan entri baru ke tabel journal. akun_debit/akun_kredit adalah nama
+    akun yang harus sudah ada di bagan akun.
     """
     try:
-        conn = get_conn()
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO journal (tanggal, akun_debit, akun_kredit, jumlah, keterangan)
-            VALUES (?, ?, ?, ?, ?)
-        """, (tanggal, akun_debit, akun_kredit, jumlah, keterangan))
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            for akun in (akun_debit, akun_kredit):
+                if _account_id(conn, akun) is None:
+                    return False, f"Akun '{akun}' belum ada di bagan akun"
+            conn.execute(JOURNAL_INSERT_SQL, (tanggal, akun_debit, akun_kredit, to_rupiah(jumlah), keterangan))
         return True, ""
+    except (sqlite3.Error, ValueError) as e:
+        return False, str(e)
+
+# Bagan akun
+ACCOUNT_TYPES = {
+    "aset": "Aset",
+    "kewajiban": "Kewajiban",
+    "modal": "Modal",
+    "pendapatan": "Pendapatan",
+    "beban": "Beban",
+}
+
+def _account_id(conn, name):
+    row = conn.execute("SELECT id FROM accounts WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def get_chart_of_accounts():
+    """Bagan akun: list of tuples (id, nama, tipe), terurut per tipe lalu nama."""
+    conn = get_conn()
+    rows = conn.execute(f"""
+        SELECT id, name, type FROM accounts
+        ORDER BY CASE type {" ".join(f"WHEN '{t}' THEN {i}" for i, t in enumerate(ACCOUNT_TYPES))} END, name
+    """).fetchall()
+    return [(r["id"], r["name"], r["type"]) for r in rows]
+
+def add_account(nama, tipe):
+    """Tambah akun ke bagan akun. Nama unik tanpa membedakan huruf besar/kecil."""
+    nama = (nama or "").strip()
+    if not nama:
+        return False, "Nama akun wajib diisi"
+    if tipe not in ACCOUNT_TYPES:
+        return False, f"Tipe akun tidak dikenal: {tipe}"
+    try:
+        with transaction() as conn:
+            conn.execute("INSERT INTO accounts (name, type) VALUES (?, ?)", (nama, tipe))
+        return True, f"Akun {nama} ditambahkan"
+    except sqlite3.IntegrityError:
+        return False, f"Akun {nama} sudah ada"
     except sqlite3.Error as e:
         return False, str(e)
 
-def create_ledger_table():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS buku_besar (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tanggal TEXT,
-            keterangan TEXT,
-            debit REAL,
-            kredit REAL
-        )
-    """)
-    conn.commit()
-    conn.close()
+# Bulk ingest
+BULK_CHUNK_SIZE = 5000
+
+ITEM_FIELDS = [("kode", str), ("nama", str), ("stok", int), ("harga", to_rupiah)]
+JOURNAL_FIELDS = [("tanggal", str), ("akun_debit", str), ("akun_kredit", str), ("jumlah", to_rupiah), ("keterangan", str)]
+
+def _iter_rows(source, fields):
+    """
+    Baca baris dari iterable (tuple/list atau dict) atau dari file CSV
+    (path atau file object dengan header sesuai nama field), satu per satu.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8") as f:
+            yield from _iter_rows(csv.DictReader(f), fields)
+        return
+    if hasattr(source, "read"):
+        source = csv.DictReader(source)
+
+    for row in source:
+        if isinstance(row, dict):
+            row = [row.get(name) for name, _ in fields]
+        yield tuple(_convert(value, convert) for value, (_, convert) in zip(row, fields))
+
+def _convert(value, convert):
+    if value is None or (value == "" and convert is not str):
+        return None
+    return convert(value)
+
+def _ingest(sql, rows, chunk_size):
+    """
+    Tulis baris per chunk dengan executemany; satu transaksi per chunk.
+    Return (True, stats) atau (False, pesan). Chunk yang sudah selesai tetap tersimpan.
+    """
+    stats = []
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            start = time.perf_counter()
+            with transaction(immediate=True) as conn:
+                conn.executemany(sql, chunk)
+            seconds = time.perf_counter() - start
+            stats.append({
+                "chunk": len(stats) + 1,
+                "rows": len(chunk),
+                "seconds": seconds,
+                "rows_per_sec": len(chunk) / seconds if seconds else float("inf"),
+            })
+    except (sqlite3.Error, ValueError) as e:
+        saved = sum(s["rows"] for s in stats)
+        return False, f"{e} (tersimpan {saved} baris sebelum error)"
+    return True, stats
+
+def add_items_bulk(source, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Versi massal add_item. source: iterable of (kode, nama, stok, harga)/dict
+    atau file CSV dengan header kode,nama,stok,harga.
+    Kode yang sudah ada: stok ditambahkan, nama dan harga diperbarui.
+    Return (True, list statistik per chunk) atau (False, pesan).
+    """
+    return _ingest(UPSERT_ITEM_SQL, _iter_rows(source, ITEM_FIELDS), chunk_size)
+
+def add_journal_entries_bulk(source, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Versi massal add_journal_entry. source: iterable of
+    (tanggal, akun_debit, akun_kredit, jumlah, keterangan)/dict
+    atau file CSV dengan header tanggal,akun_debit,akun_kredit,jumlah,keterangan.
+    Return (True, list statistik per chunk) atau (False, pesan).
+    """
+    return _ingest(JOURNAL_INSERT_SQL, _iter_rows(source, JOURNAL_FIELDS), chunk_size)
+
+def get_accounts():
+    """
+    Nama semua akun di bagan akun, terurut.
+    """
+    conn = get_conn()
+    rows = conn.execute("SELECT name FROM accounts ORDER BY name").fetchall()
+    return [r[0] for r in rows]
+
+ACCOUNT_LEDGER_SQL = """
+    SELECT id, date AS tanggal, description AS keterangan,
+           amount AS debit, 0 AS kredit, 0 AS sisi
+    FROM journal
+    WHERE debit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+    UNION ALL
+    SELECT id, date, description,
+           0, amount, 1
+    FROM journal
+    WHERE credit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+    ORDER BY tanggal, id, sisi
+"""
+
+def get_account_ledger(akun):
+    """
+    Mengambil baris buku besar untuk satu akun saja, memakai indeks
+    idx_journal_debit dan idx_journal_credit.
+    Mengembalikan list of tuples: (id, tanggal, keterangan, debit, kredit),
+    terurut berdasarkan tanggal lalu id.
+    """
+    conn = get_conn()
+    rows = conn.execute(ACCOUNT_LEDGER_SQL, {"akun": akun}).fetchall()
+    return [(r["id"], r["tanggal"], r["keterangan"], r["debit"], r["kredit"]) for r in rows]
+
+LEDGER_PAGE_SIZE = 200
+
+ACCOUNT_LEDGER_PAGE_SQL = """
+    WITH page AS (
+        SELECT id, date AS tanggal, description AS keterangan,
+               amount AS debit, 0 AS kredit, 0 AS sisi
+        FROM journal
+        WHERE debit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+          AND (date, id) > (:tanggal, :id)
+          AND date <= :sampai
+        UNION ALL
+        SELECT id, date, description,
+               0, amount, 1
+        FROM journal
+        WHERE credit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+          AND (date, id) >= (:tanggal, :id)
+          AND (date, id, 1) > (:tanggal, :id, :sisi)
+          AND date <= :sampai
+        ORDER BY tanggal, id, sisi
+        LIMIT :limit
+    )
+    SELECT id, tanggal, keterangan, debit, kredit, sisi,
+           :saldo + SUM(debit - kredit) OVER (
+               ORDER BY tanggal, id, sisi ROWS UNBOUNDED PRECEDING
+           ) AS saldo
+    FROM page
+    ORDER BY tanggal, id, sisi
+"""
+
+def get_account_ledger_page(akun, cursor=None, limit=LEDGER_PAGE_SIZE, sampai=None):
+    """
+    Satu halaman buku besar akun dengan saldo berjalan dihitung di SQLite
+    (SUM() OVER (ORDER BY tanggal, id)) dan keyset pagination.
+    cursor: None untuk halaman pertama, atau cursor dari halaman sebelumnya
+    (atau ledger_start_cursor untuk mulai dari tanggal tertentu).
+    sampai: tanggal terakhir ('YYYY-MM-DD', inklusif), None tanpa batas.
+    Mengembalikan (rows, next_cursor); rows berisi tuples
+    (id, tanggal, keterangan, debit, kredit, saldo). next_cursor None jika sudah habis.
+    """
+    tanggal, entry_id, sisi, saldo = cursor or ("", 0, -1, 0)
+    conn = get_conn()
+    rows = []
+    if tanggal < _archive_end(conn):
+        # Cursor masih di bulan yang diarsip: lanjutkan dari Parquet dulu
+        rows = _archived_ledger_rows(akun, (tanggal, entry_id, sisi, saldo), limit + 1, sampai)
+        if rows:
+            saldo = rows[-1][6]
+        tanggal, entry_id, sisi = MIN_DATE, 0, -1
+
+    if len(rows) <= limit:
+        rows += [tuple(r) for r in conn.execute(ACCOUNT_LEDGER_PAGE_SQL, {
+            "akun": akun, "tanggal": tanggal, "id": entry_id, "sisi": sisi,
+            "saldo": saldo, "limit": limit + 1 - len(rows), "sampai": sampai or MAX_DATE,
+        }).fetchall()]
+
+    # rows: (id, tanggal, keterangan, debit, kredit, sisi, saldo)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = (last[1], last[0], last[5], last[6])
+    return [(r[0], r[1], r[2], r[3], r[4], r[6]) for r in rows], next_cursor
+
+def _archived_ledger_rows(akun, cursor, limit, sampai=None):
+    """
+    Baris buku besar akun dari arsip Parquet setelah cursor, paling banyak limit,
+    sebagai tuples (id, tanggal, keterangan, debit, kredit, sisi, saldo).
+    """
+    tanggal, entry_id, sisi, saldo = cursor
+    frame = archive.read(
+        DB_PATH, _archived_months(tanggal, sampai),
+        columns=["id", "tanggal", "akun_debit", "akun_kredit", "jumlah", "keterangan"],
+        start=tanggal, end=sampai, akun=akun
+    )
+    sides = []
+    for side, column in ((0, "akun_debit"), (1, "akun_kredit")):
+        part = frame[frame[column] == akun]
+        sides.append(pd.DataFrame({
+            "id": part["id"], "tanggal": part["tanggal"], "keterangan": part["keterangan"],
+            "debit": part["jumlah"] if side == 0 else 0,
+            "kredit": part["jumlah"] if side == 1 else 0,
+            "sisi": side,
+        }))
+    ledger = pd.concat(sides, ignore_index=True).sort_values(["tanggal", "id", "sisi"], kind="stable")
+    after = (ledger["tanggal"] > tanggal) | ((ledger["tanggal"] == tanggal) & (
+        (ledger["id"] > entry_id) | ((ledger["id"] == entry_id) & (ledger["sisi"] > sisi))))
+    ledger = ledger[after].head(limit)
+    ledger["saldo"] = saldo + (ledger["debit"] - ledger["kredit"]).cumsum()
+    return list(map(tuple, ledger.astype(object).to_numpy()))
+
+def iter_account_ledger_frames(akun, chunk_size=STREAM_CHUNK_SIZE, dari=None, sampai=None):
+    """
+    Yield DataFrame buku besar satu akun per halaman keyset
+    (kolom: id, tanggal, keterangan, debit, kredit, saldo), opsional dibatasi
+    rentang tanggal dari/sampai dengan saldo awal per tanggal dari. Akun tanpa
+    transaksi tetap menghasilkan satu DataFrame kosong (agar export punya header).
+    """
+    columns = ["id", "tanggal", "keterangan", "debit", "kredit", "saldo"]
+    cursor = ledger_start_cursor(akun, dari) if dari else None
+    empty = True
+    while True:
+        rows, cursor = get_account_ledger_page(akun, cursor, limit=chunk_size, sampai=sampai)
+        if rows or (empty and cursor is None):
+            yield pd.DataFrame(rows, columns=columns)
+            empty = False
+        if cursor is None:
+            return
+
+def explain_account_ledger(akun):
+    """Hasil EXPLAIN QUERY PLAN untuk query buku besar satu akun (list of str)."""
+    conn = get_conn()
+    rows = conn.execute("EXPLAIN QUERY PLAN " + ACCOUNT_LEDGER_SQL, {"akun": akun}).fetchall()
+    return [r["detail"] for r in rows]
+
+def iter_general_ledger(chunk_size=STREAM_CHUNK_SIZE):
+    """Yield baris buku_besar satu per satu: (tanggal, keterangan, debit, kredit)."""
+    return _iter_query(
+        "SELECT tanggal, keterangan, debit, kredit FROM buku_besar ORDER BY tanggal ASC",
+        chunk_size=chunk_size
+    )
 
 def get_general_ledger():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT tanggal, keterangan, debit, kredit FROM buku_besar ORDER BY tanggal ASC")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    return list(iter_general_ledger())
 
-def get_trial_balance():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Ambil total debit per akun
-    cursor.execute("""
-        SELECT akun_debit AS akun, SUM(jumlah) AS total_debit
-        FROM jurnal_umum
-        GROUP BY akun_debit
-    """)
-    debit_rows = cursor.fetchall()
-    debit_dict = {akun: jumlah for akun, jumlah in debit_rows}
-
-    # Ambil total kredit per akun
-    cursor.execute("""
-        SELECT akun_kredit AS akun, SUM(jumlah) AS total_kredit
-        FROM jurnal_umum
-        GROUP BY akun_kredit
-    """)
-    kredit_rows = cursor.fetchall()
-    kredit_dict = {akun: jumlah for akun, jumlah in kredit_rows}
-
-    akun_set = set(debit_dict.keys()) | set(kredit_dict.keys())
-    trial_balance = []
-    for akun in sorted(akun_set):
-        total_debit = debit_dict.get(akun, 0)
-        total_kredit = kredit_dict.get(akun, 0)
-        trial_balance.append((akun, total_debit, total_kredit))
-
-    conn.close()
-    return trial_balance
+# Total seluruh riwayat per id akun: snapshot periode terakhir yang diarsip + jurnal live
+ACCOUNT_TOTALS_SQL = """
+    SELECT account_id, SUM(debit) AS debit, SUM(credit) AS credit
+    FROM (
+        SELECT account_id, debit, credit FROM period_balances
+        WHERE period = (SELECT MAX(period) FROM archived_periods)
+        UNION ALL
+        SELECT debit_account_id, amount, 0 FROM journal
+        UNION ALL
+        SELECT credit_account_id, 0, amount FROM journal
+    )
+    GROUP BY account_id
+"""
 
 def get_trial_balance():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Ambil total debit per akun
-    cursor.execute("""
-        SELECT akun_debit AS akun, SUM(jumlah) AS total_debit
-        FROM jurnal_umum
-        GROUP BY akun_debit
-    """)
-    debit_rows = cursor.fetchall()
-    debit_dict = {akun: jumlah for akun, jumlah in debit_rows}
-
-    # Ambil total kredit per akun
-    cursor.execute("""
-        SELECT akun_kredit AS akun, SUM(jumlah) AS total_kredit
-        FROM jurnal_umum
-        GROUP BY akun_kredit
-    """)
-    kredit_rows = cursor.fetchall()
-    kredit_dict = {akun: jumlah for akun, jumlah in kredit_rows}
-
-    akun_set = set(debit_dict.keys()) | set(kredit_dict.keys())
-    trial_balance = []
-    for akun in sorted(akun_set):
-        total_debit = debit_dict.get(akun, 0)
-        total_kredit = kredit_dict.get(akun, 0)
-        trial_balance.append((akun, total_debit, total_kredit))
-
-    conn.close()
-    return trial_balance
+    """
+    Neraca saldo dari tabel account_balances (dijaga oleh trigger pada journal),
+    sehingga biayanya sebanding jumlah akun, bukan jumlah entri jurnal.
+    Mengembalikan list of tuples: (akun, total_debit, total_kredit), terurut per akun.
+    """
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT a.name AS account, b.debit, b.credit
+        FROM account_balances b
+        JOIN accounts a ON a.id = b.account_id
+        WHERE b.debit <> 0 OR b.credit <> 0
+        ORDER BY a.name
+    """).fetchall()
+    return [(r["account"], r["debit"], r["credit"]) for r in rows]
+
+def rebuild_account_balances():
+    """Hitung ulang account_balances dari seluruh jurnal (arsip + live)."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM account_balances")
+        conn.execute(f"INSERT INTO account_balances (account_id, debit, credit) {ACCOUNT_TOTALS_SQL}")
+
+def verify_account_balances(repair=False):
+    """
+    Bandingkan account_balances dengan hasil hitung ulang dari jurnal.
+    Mengembalikan list of tuples (akun, debit_tersimpan, kredit_tersimpan,
+    debit_seharusnya, kredit_seharusnya) untuk akun yang berbeda.
+    Jika repair=True dan ada selisih, tabel dibangun ulang.
+    """
+    conn = get_conn()
+    rows = conn.execute(f"""
+        SELECT a.name,
+               SUM(stored_debit), SUM(stored_credit),
+               SUM(actual_debit), SUM(actual_credit)
+        FROM (
+            SELECT account_id, debit AS stored_debit, credit AS stored_credit,
+                   0 AS actual_debit, 0 AS actual_credit
+            FROM account_balances
+            UNION ALL
+            SELECT account_id, 0, 0, debit, credit
+            FROM ({ACCOUNT_TOTALS_SQL})
+        ) t
+        JOIN accounts a ON a.id = t.account_id
+        GROUP BY t.account_id
+        ORDER BY a.name
+    """).fetchall()
+    drift = [
+        tuple(r) for r in rows
+        if r[1] != r[3] or r[2] != r[4]
+    ]
+    if drift and repair:
+        rebuild_account_balances()
+    return drift
+
+# Tutup periode (bulanan)
+# period_balances menyimpan saldo kumulatif tiap akun sampai akhir periode yang
+# ditutup. Saldo per tanggal = snapshot terdekat sebelumnya + jurnal sesudahnya.
+# Jurnal dalam periode yang sudah ditutup dikunci oleh trigger.
+class PeriodClosedError(Exception):
+    """Periode tidak bisa ditutup atau dibuka kembali."""
+
+PERIOD_RE = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+def is_valid_period(period):
+    """True untuk periode 'YYYY-MM' yang lengkap (bulan dua digit, 01-12)."""
+    return isinstance(period, str) and PERIOD_RE.fullmatch(period) is not None
+
+def _check_period(period):
+    # Periode dibandingkan sebagai teks, jadi '2024-1' akan terurut sesudah '2024-09'
+    if not is_valid_period(period):
+        raise PeriodClosedError(f"Format periode harus YYYY-MM (misalnya 2025-06), bukan {period!r}")
 
+def _next_month_start(period):
+    """'2025-06' -> '2025-07-01'; None (belum ada periode ditutup) -> ''."""
+    if not period:
+        return ""
+    year, month = map(int, period.split("-"))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01"
+
+def get_closed_periods():
+    """Daftar periode yang sudah ditutup: list of tuples (periode 'YYYY-MM', ditutup_pada), terurut."""
+    conn = get_conn()
+    rows = conn.execute("SELECT period, closed_at FROM period_closes ORDER BY period").fetchall()
+    return [(r["period"], r["closed_at"]) for r in rows]
+
+def get_last_closed_period(conn=None):
+    """Periode terakhir yang ditutup ('YYYY-MM'), atau None."""
+    conn = conn or get_conn()
+    return conn.execute("SELECT MAX(period) FROM period_closes").fetchone()[0]
+
+def get_open_periods():
+    """
+    Bulan yang bisa ditutup: sejak bulan jurnal pertama setelah periode terakhir
+    yang ditutup sampai bulan lalu (bulan berjalan tidak bisa ditutup).
+    """
+    conn = get_conn()
+    last = get_last_closed_period(conn)
+    first = conn.execute(
+        "SELECT MIN(date) FROM journal WHERE date >= ?", (_next_month_start(last),)
+    ).fetchone()[0]
+    if first is None:
+        return []
+    periods = []
+    period, current = first[:7], date.today().strftime("%Y-%m")
+    while period < current:
+        periods.append(period)
+        period = _next_month_start(period)[:7]
+    return periods
+
+CLOSE_PERIOD_SQL = """
+    INSERT INTO period_balances (period, account_id, debit, credit)
+    SELECT :period, account_id, SUM(debit), SUM(credit)
+    FROM (
+        SELECT account_id, debit, credit FROM period_balances WHERE period = :previous
+        UNION ALL
+        SELECT debit_account_id, amount, 0 FROM journal WHERE date >= :start AND date < :end
+        UNION ALL
+        SELECT credit_account_id, 0, amount FROM journal WHERE date >= :start AND date < :end
+    )
+    GROUP BY account_id
+"""
+
+def close_period(period):
+    """
+    Tutup periode 'YYYY-MM': simpan saldo kumulatif per akun sampai akhir bulan itu
+    (snapshot sebelumnya + jurnal sejak snapshot tersebut), lalu kunci jurnal
+    sampai akhir periode. Periode harus lebih baru dari periode terakhir yang
+    ditutup dan lebih lama dari bulan berjalan.
+    """
+    try:
+        _check_period(period)
+        with transaction(immediate=True) as conn:
+            previous = get_last_closed_period(conn)
+            if previous is not None and period <= previous:
+                raise PeriodClosedError(f"Periode sampai {previous} sudah ditutup")
+            if period >= date.today().strftime("%Y-%m"):
+                raise PeriodClosedError("Bulan berjalan belum bisa ditutup")
+            conn.execute(
+                "INSERT INTO period_closes (period, closed_at) VALUES (?, ?)",
+                (period, time.strftime("%Y-%m-%dT%H:%M:%S"))
+            )
+            conn.execute(CLOSE_PERIOD_SQL, {
+                "period": period, "previous": previous,
+                "start": _next_month_start(previous), "end": _next_month_start(period),
+            })
+        return True, f"Periode {period} berhasil ditutup"
+    except PeriodClosedError as e:
+        return False, str(e)
+    except sqlite3.Error as e:
+        return False, str(e)
+
+def reopen_last_period():
+    """Buka kembali periode terakhir yang ditutup (snapshot-nya dihapus)."""
+    try:
+        with transaction(immediate=True) as conn:
+            period = get_last_closed_period(conn)
+            if period is None:
+                raise PeriodClosedError("Belum ada periode yang ditutup")
+            if period == get_archived_through(conn):
+                raise PeriodClosedError(f"Periode {period} sudah diarsip dan tidak bisa dibuka kembali")
+            conn.execute("DELETE FROM period_balances WHERE period = ?", (period,))
+            conn.execute("DELETE FROM period_closes WHERE period = ?", (period,))
+        return True, f"Periode {period} dibuka kembali"
+    except PeriodClosedError as e:
+        return False, str(e)
+    except sqlite3.Error as e:
+        return False, str(e)
+
+def archive_closed_periods(through=None):
+    """
+    Pindahkan jurnal periode tertutup (sampai through 'YYYY-MM', default periode
+    terakhir yang ditutup) ke partisi Parquet per bulan, lalu hapus dari tabel journal.
+    Selama penghapusan archive_state.archiving = 1, sehingga trigger saldo dan kunci
+    periode dilewati: account_balances tetap mencakup baris yang diarsip.
+    Return (True, [(bulan, jumlah_baris)]) atau (False, pesan).
+    """
+    if not archive.AVAILABLE:
+        return False, "Arsip Parquet membutuhkan paket pyarrow"
+    written = []
+    try:
+        if through is not None:
+            _check_period(through)
+        with transaction(immediate=True) as conn:
+            last_closed = get_last_closed_period(conn)
+            if last_closed is None:
+                raise PeriodClosedError("Belum ada periode yang ditutup")
+            through = through or last_closed
+            if through > last_closed:
+                raise PeriodClosedError(f"Periode {through} belum ditutup")
+            start = _archive_end(conn)
+            periods = [r[0] for r in conn.execute(
+                "SELECT period FROM period_closes WHERE period >= ? AND period <= ? ORDER BY period",
+                (start[:7], through)
+            )]
+            if not periods:
+                raise PeriodClosedError("Tidak ada periode tertutup yang belum diarsip")
+
+            end = _next_month_start(periods[-1])
+            first = conn.execute(
+                "SELECT MIN(date) FROM journal WHERE date >= ? AND date < ?", (start, end)
+            ).fetchone()[0]
+            month = first[:7] if first else None
+            while month and f"{month}-01" < end:
+                frame = pd.read_sql(JOURNAL_SQL, conn, params={"dari": f"{month}-01", "sampai": f"{month}-31"})
+                if not frame.empty:
+                    archive.write_partition(DB_PATH, month, frame)
+                    written.append((month, len(frame)))
+                month = _next_month_start(month)[:7]
+
+            conn.execute("UPDATE archive_state SET archiving = 1")
+            conn.execute("DELETE FROM journal WHERE date >= ? AND date < ?", (start, end))
+            conn.execute("UPDATE archive_state SET archiving = 0")
+            archived_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            conn.executemany(
+                "INSERT INTO archived_periods (period, archived_at) VALUES (?, ?)",
+                [(period, archived_at) for period in periods]
+            )
+        return True, written
+    except PeriodClosedError as e:
+        return False, str(e)
+    except (sqlite3.Error, OSError) as e:
+        for month, _ in written:
+            archive.remove_partition(DB_PATH, month)
+        return False, str(e)
+
+def _archived_activity(start, end, end_inclusive=True, akun=None):
+    """
+    Mutasi per akun dari arsip Parquet dalam [start, end]; hanya kolom akun dan
+    jumlah yang dibaca. DataFrame dengan index akun dan kolom debit, credit.
+    """
+    frame = archive.read(
+        DB_PATH, _archived_months(start, end), columns=["akun_debit", "akun_kredit", "jumlah"],
+        start=start, end=end, end_inclusive=end_inclusive, akun=akun
+    )
+    return pd.DataFrame({
+        "debit": frame.groupby("akun_debit")["jumlah"].sum(),
+        "credit": frame.groupby("akun_kredit")["jumlah"].sum(),
+    }).fillna(0).astype("int64")
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _nocase(names):
+    """Kunci urut pandas yang meniru collation NOCASE SQLite."""
+    return names.str.translate(_ASCII_LOWER)
+
+def _add_archived(rows, start, end):
+    """Gabungkan baris (akun, debit, kredit) dari SQLite dengan mutasi arsip dalam [start, end]."""
+    if start >= _archive_end():
+        return rows
+    extra = _archived_activity(start, end)
+    if extra.empty:
+        return rows
+    live = pd.DataFrame(rows, columns=["account", "debit", "credit"]).set_index("account")
+    # Urutan sama dengan ORDER BY a.name (kolom COLLATE NOCASE: hanya A-Z yang dilipat)
+    total = live.add(extra, fill_value=0).astype("int64").sort_index(key=_nocase)
+    return [(account, int(debit), int(credit)) for account, debit, credit in total.itertuples()]
+
+def _snapshot_before(conn, tanggal):
+    """Periode tertutup terakhir yang berakhir sebelum tanggal ('YYYY-MM-DD'), atau None."""
+    return conn.execute(
+        "SELECT MAX(period) FROM period_closes WHERE period < ?", (tanggal[:7],)
+    ).fetchone()[0]
+
+TRIAL_BALANCE_AS_OF_SQL = """
+    SELECT a.name AS account, SUM(t.debit) AS debit, SUM(t.credit) AS credit
+    FROM (
+        SELECT account_id, debit, credit FROM period_balances WHERE period = :period
+        UNION ALL
+        SELECT debit_account_id, amount, 0 FROM journal WHERE date >= :start AND date <= :as_of
+        UNION ALL
+        SELECT credit_account_id, 0, amount FROM journal WHERE date >= :start AND date <= :as_of
+    ) t
+    JOIN accounts a ON a.id = t.account_id
+    GROUP BY t.account_id
+    ORDER BY a.name
+"""
+
+JOURNAL_ACTIVITY_SQL = """
+    SELECT a.name AS account, SUM(t.debit) AS debit, SUM(t.credit) AS credit
+    FROM (
+        SELECT debit_account_id AS account_id, amount AS debit, 0 AS credit
+        FROM journal WHERE date BETWEEN :dari AND :sampai
+        UNION ALL
+        SELECT credit_account_id, 0, amount
+        FROM journal WHERE date BETWEEN :dari AND :sampai
+    ) t
+    JOIN accounts a ON a.id = t.account_id
+    GROUP BY t.account_id
+    ORDER BY a.name
+"""
+
+def get_account_activity(dari=None, sampai=None):
+    """
+    Mutasi debit/kredit per akun dalam rentang tanggal (inklusif), dibaca lewat
+    idx_journal_date. Mengembalikan list of tuples: (akun, debit, kredit), terurut per akun.
+    """
+    conn = get_conn()
+    rows = conn.execute(JOURNAL_ACTIVITY_SQL, _date_range(dari, sampai)).fetchall()
+    rows = [(r["account"], r["debit"], r["credit"]) for r in rows]
+    return _add_archived(rows, dari or MIN_DATE, sampai or MAX_DATE)
+
+def get_trial_balance_as_of(as_of):
+    """
+    Neraca saldo per tanggal as_of ('YYYY-MM-DD', termasuk hari itu):
+    snapshot periode tertutup terdekat sebelumnya + jurnal sejak snapshot itu.
+    Mengembalikan list of tuples: (akun, total_debit, total_kredit), terurut per akun.
+    """
+    conn = get_conn()
+    period = _snapshot_before(conn, as_of)
+    rows = conn.execute(TRIAL_BALANCE_AS_OF_SQL, {
+        "period": period, "start": _next_month_start(period), "as_of": as_of,
+    }).fetchall()
+    rows = [(r["account"], r["debit"], r["credit"]) for r in rows]
+    return _add_archived(rows, _next_month_start(period), as_of)
+
+ACCOUNT_OPENING_BALANCE_SQL = """
+    SELECT COALESCE(SUM(saldo), 0)
+    FROM (
+        SELECT debit - credit AS saldo FROM period_balances
+        WHERE period = :period AND account_id = (SELECT id FROM accounts WHERE name = :akun)
+        UNION ALL
+        SELECT amount FROM journal
+        WHERE debit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+          AND date >= :start AND date < :tanggal
+        UNION ALL
+        SELECT -amount FROM journal
+        WHERE credit_account_id = (SELECT id FROM accounts WHERE name = :akun)
+          AND date >= :start AND date < :tanggal
+    )
+"""
+
+def get_account_opening_balance(akun, tanggal):
+    """Saldo akun (debit - kredit) sebelum tanggal ('YYYY-MM-DD'), dari snapshot terdekat + selisihnya."""
+    conn = get_conn()
+    period = _snapshot_before(conn, tanggal)
+    start = _next_month_start(period)
+    saldo = conn.execute(ACCOUNT_OPENING_BALANCE_SQL, {
+        "period": period, "akun": akun, "start": start, "tanggal": tanggal,
+    }).fetchone()[0]
+    if start < _archive_end(conn):
+        extra = _archived_activity(start, tanggal, end_inclusive=False, akun=akun)
+        if akun in extra.index:
+            saldo += int(extra.at[akun, "debit"] - extra.at[akun, "credit"])
+    return saldo
+
+def ledger_start_cursor(akun, tanggal):
+    """
+    Cursor untuk get_account_ledger_page agar buku besar dimulai dari tanggal
+    ('YYYY-MM-DD') dengan saldo awal per tanggal itu.
+    """
+    return (tanggal, 0, -1, get_account_opening_balance(akun, tanggal))
+
+# Laporan keuangan: satu agregasi per akun untuk laba rugi dan neraca sekaligus
+STATEMENT_TOTALS_SQL = """
+    SELECT a.name AS account, a.type AS type,
+           SUM(CASE WHEN t.tanggal >= :dari THEN t.debit ELSE 0 END) AS period_debit,
+           SUM(CASE WHEN t.tanggal >= :dari THEN t.credit ELSE 0 END) AS period_credit,
+           SUM(t.debit) AS closing_debit,
+           SUM(t.credit) AS closing_credit
+    FROM (
+        -- snapshot bertanggal '': masuk mutasi hanya jika laporan dimulai dari awal
+        SELECT account_id, '' AS tanggal, debit, credit
+        FROM period_balances WHERE period = :period
+        UNION ALL
+        SELECT debit_account_id, date, amount, 0 FROM journal WHERE date >= :start AND date <= :sampai
+        UNION ALL
+        SELECT credit_account_id, date, 0, amount FROM journal WHERE date >= :start AND date <= :sampai
+    ) t
+    JOIN accounts a ON a.id = t.account_id
+    GROUP BY t.account_id
+    ORDER BY a.name
+"""
+
+STATEMENT_COLUMNS = ["akun", "tipe", "mutasi_debit", "mutasi_kredit", "saldo_debit", "saldo_kredit"]
+
+def get_statement_totals(dari=None, sampai=None):
+    """
+    Per akun dalam satu lintasan: mutasi debit/kredit dalam [dari, sampai] (untuk laba
+    rugi) dan saldo kumulatif per sampai (untuk neraca). Dimulai dari snapshot periode
+    tertutup terakhir sebelum dari, ditambah jurnal (arsip dan live) sesudahnya.
+    Mengembalikan DataFrame dengan kolom STATEMENT_COLUMNS.
+    """
+    dari, sampai = dari or MIN_DATE, sampai or MAX_DATE
+    conn = get_conn()
+    period = _snapshot_before(conn, dari or sampai)
+    start = _next_month_start(period)
+    rows = conn.execute(STATEMENT_TOTALS_SQL, {
+        "period": period, "start": start, "dari": dari, "sampai": sampai,
+    }).fetchall()
+    totals = pd.DataFrame([tuple(r) for r in rows], columns=STATEMENT_COLUMNS)
+
+    if start < _archive_end(conn):
+        frame = archive.read(
+            DB_PATH, _archived_months(start, sampai),
+            columns=["tanggal", "akun_debit", "akun_kredit", "jumlah"], start=start, end=sampai
+        )
+        in_period = frame["tanggal"] >= dari
+        sides = [
+            pd.DataFrame({"akun": frame["akun_debit"], "mutasi_debit": frame["jumlah"].where(in_period, 0),
+                          "mutasi_kredit": 0, "saldo_debit": frame["jumlah"], "saldo_kredit": 0}),
+            pd.DataFrame({"akun": frame["akun_kredit"], "mutasi_debit": 0,
+                          "mutasi_kredit": frame["jumlah"].where(in_period, 0),
+                          "saldo_debit": 0, "saldo_kredit": frame["jumlah"]}),
+        ]
+        archived = pd.concat(sides, ignore_index=True).groupby("akun").sum()
+        types = {name: tipe for _, name, tipe in get_chart_of_accounts()}
+        totals = (totals.drop(columns="tipe").set_index("akun")
+                  .add(archived, fill_value=0).astype("int64").reset_index())
+        totals.insert(1, "tipe", totals["akun"].map(types))
+    return totals[STATEMENT_COLUMNS]
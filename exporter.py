@@ -0,0 +1,108 @@
+# exporter.py
+# Export laporan ke CSV/XLSX secara bertahap: data dibaca per chunk dari SQLite
+# dan langsung ditulis ke file sementara di disk, tanpa membangun seluruh file di memori.
+# Tombol download menerima file itu sebagai file biasa (csv_file/xlsx_file); Streamlit
+# sendiri tetap membaca isinya sekali untuk dikirim ke browser.
+import os
+import tempfile
+
+import pandas as pd
+
+import db_manager as db
+import ledger
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX opsional, CSV selalu tersedia
+    Workbook = None
+
+XLSX_AVAILABLE = Workbook is not None
+
+CSV_MIME = "text/csv"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+JOURNAL_COLUMNS = {
+    "id": "ID", "tanggal": "Tanggal", "akun_debit": "Akun Debit",
+    "akun_kredit": "Akun Kredit", "jumlah": "Jumlah", "keterangan": "Keterangan"
+}
+LEDGER_COLUMNS = {
+    "akun": "Akun", "id": "ID", "tanggal": "Tanggal", "keterangan": "Keterangan",
+    "debit": "Debit", "kredit": "Kredit", "saldo": "Saldo"
+}
+
+# Sumber data (generator DataFrame)
+def inventory_frames(chunk_size=db.STREAM_CHUNK_SIZE):
+    for chunk in db.iter_valuation_frames(chunk_size):
+        yield chunk[["id", "nama", "stok", "harga", "nilai", "hpp"]].rename(
+            columns={"nama": "Nama Barang", "stok": "Stok", "harga": "Harga", "nilai": "Nilai FIFO", "hpp": "HPP"})
+
+def journal_frames(chunk_size=db.STREAM_CHUNK_SIZE, dari=None, sampai=None):
+    for chunk in db.iter_journal_frames(chunk_size, dari, sampai):
+        yield chunk.rename(columns=JOURNAL_COLUMNS)
+
+def ledger_frames(akun, chunk_size=db.STREAM_CHUNK_SIZE, dari=None, sampai=None):
+    for chunk in db.iter_account_ledger_frames(akun, chunk_size, dari, sampai):
+        yield chunk.rename(columns=LEDGER_COLUMNS)
+
+def all_ledger_frames(dari=None, sampai=None):
+    # Semua akun sekaligus dari mesin buku besar tervektorisasi
+    yield ledger.load_ledger_range(dari, sampai).rename(columns=LEDGER_COLUMNS)
+
+def trial_balance_frames():
+    yield pd.DataFrame(db.get_trial_balance(), columns=["Akun", "Debit", "Kredit"])
+
+# Penulis file
+def write_csv(frames, target=None):
+    """
+    Tulis DataFrame satu per satu ke CSV. target: file biner; default file sementara.
+    Return file dengan posisi di awal, siap dibaca.
+    """
+    target = target or tempfile.TemporaryFile()
+    header = True
+    for frame in frames:
+        target.write(frame.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+    target.seek(0)
+    return target
+
+def write_xlsx(frames, target=None, sheet_name="Data"):
+    """
+    Tulis DataFrame satu per satu ke XLSX dengan workbook write-only openpyxl
+    (baris langsung dialirkan ke file, tidak disimpan di memori).
+    """
+    if Workbook is None:
+        raise RuntimeError("Export XLSX membutuhkan paket openpyxl")
+
+    target = target or tempfile.TemporaryFile()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    header = True
+    for frame in frames:
+        if header:
+            ws.append(list(frame.columns))
+            header = False
+        for row in frame.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(target)
+    target.seek(0)
+    return target
+
+def _reader(target):
+    """
+    Buka ulang file sementara sebagai io.BufferedReader (tipe file yang diterima
+    st.download_button) lewat salinan file descriptor; isinya tidak disalin ke memori.
+    File sementara tetap terhapus saat reader ditutup.
+    """
+    target.flush()
+    reader = open(os.dup(target.fileno()), "rb")
+    target.close()
+    reader.seek(0)
+    return reader
+
+def csv_file(frames):
+    """CSV di file sementara, siap dibaca (untuk st.download_button)."""
+    return _reader(write_csv(frames))
+
+def xlsx_file(frames, sheet_name="Data"):
+    """XLSX di file sementara, siap dibaca (untuk st.download_button)."""
+    return _reader(write_xlsx(frames, sheet_name=sheet_name))
@@ -0,0 +1,71 @@
+# financials.py
+# Laporan laba rugi dan neraca dari satu agregasi per akun (db.get_statement_totals):
+# laba rugi memakai mutasi dalam rentang, neraca memakai saldo kumulatif per akhir rentang.
+import pandas as pd
+
+import db_manager as db
+from read_cache import cached_read
+
+DEBIT_NORMAL = {"aset", "beban"}
+RETAINED_EARNINGS = "Laba Ditahan & Laba Berjalan"
+
+def _section(totals, tipe, debit_column, credit_column):
+    """Baris akun satu tipe sebagai DataFrame (akun, jumlah) dengan saldo normal tipe itu."""
+    rows = totals[totals["tipe"] == tipe]
+    if tipe in DEBIT_NORMAL:
+        jumlah = rows[debit_column] - rows[credit_column]
+    else:
+        jumlah = rows[credit_column] - rows[debit_column]
+    section = pd.DataFrame({"akun": rows["akun"], "jumlah": jumlah.astype("int64")})
+    return section[section["jumlah"] != 0].reset_index(drop=True)
+
+def income_statement(totals):
+    """
+    Laba rugi dari mutasi dalam rentang. totals: DataFrame kolom db.STATEMENT_COLUMNS.
+    Return dict: pendapatan, beban (DataFrame akun, jumlah), total_pendapatan, total_beban, laba_bersih.
+    """
+    pendapatan = _section(totals, "pendapatan", "mutasi_debit", "mutasi_kredit")
+    beban = _section(totals, "beban", "mutasi_debit", "mutasi_kredit")
+    total_pendapatan = int(pendapatan["jumlah"].sum())
+    total_beban = int(beban["jumlah"].sum())
+    return {
+        "pendapatan": pendapatan,
+        "beban": beban,
+        "total_pendapatan": total_pendapatan,
+        "total_beban": total_beban,
+        "laba_bersih": total_pendapatan - total_beban,
+    }
+
+def balance_sheet(totals):
+    """
+    Neraca per akhir rentang dari saldo kumulatif. Pendapatan dikurangi beban sejak
+    awal pembukuan masuk ke modal sebagai laba ditahan dan laba berjalan.
+    Return dict: aset, kewajiban, modal (DataFrame akun, jumlah), total_aset,
+    total_kewajiban, total_modal, seimbang.
+    """
+    aset = _section(totals, "aset", "saldo_debit", "saldo_kredit")
+    kewajiban = _section(totals, "kewajiban", "saldo_debit", "saldo_kredit")
+    modal = _section(totals, "modal", "saldo_debit", "saldo_kredit")
+    laba = int(_section(totals, "pendapatan", "saldo_debit", "saldo_kredit")["jumlah"].sum()
+               - _section(totals, "beban", "saldo_debit", "saldo_kredit")["jumlah"].sum())
+    if laba:
+        modal = pd.concat([modal, pd.DataFrame({"akun": [RETAINED_EARNINGS], "jumlah": [laba]})],
+                          ignore_index=True)
+    total_aset = int(aset["jumlah"].sum())
+    total_kewajiban = int(kewajiban["jumlah"].sum())
+    total_modal = int(modal["jumlah"].sum())
+    return {
+        "aset": aset,
+        "kewajiban": kewajiban,
+        "modal": modal,
+        "total_aset": total_aset,
+        "total_kewajiban": total_kewajiban,
+        "total_modal": total_modal,
+        "seimbang": total_aset == total_kewajiban + total_modal,
+    }
+
+@cached_read
+def financial_statements(dari=None, sampai=None):
+    """Laba rugi untuk [dari, sampai] dan neraca per sampai dari satu lintasan data."""
+    totals = db.get_statement_totals(dari, sampai)
+    return income_statement(totals), balance_sheet(totals)
@@ -0,0 +1,74 @@
+# ledger.py
+# Buku besar tervektorisasi: seluruh baris dibangun dengan operasi kolom
+# pandas/NumPy (tanpa iterrows), saldo berjalan dengan groupby-cumsum per akun.
+import numpy as np
+import pandas as pd
+
+import db_manager as db
+from read_cache import cached_read
+
+LEDGER_COLUMNS = ["akun", "id", "tanggal", "keterangan", "debit", "kredit", "saldo"]
+LEDGER_DTYPES = {"akun": "object", "id": "int64", "tanggal": "object", "keterangan": "object",
+                 "debit": "int64", "kredit": "int64", "saldo": "int64"}
+
+def empty_ledger():
+    """Buku besar tanpa baris dengan kolom dan tipe yang sama seperti build_ledger."""
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in LEDGER_DTYPES.items()})
+
+def build_ledger(journal, account=None):
+    """
+    Bangun buku besar dari DataFrame jurnal (kolom: id, tanggal, akun_debit,
+    akun_kredit, jumlah, keterangan).
+    account=None membangun semua akun sekaligus; jika diisi, hanya akun itu.
+    Mengembalikan DataFrame (akun, id, tanggal, keterangan, debit, kredit, saldo)
+    terurut per akun lalu tanggal, id, dengan sisi debit sebelum kredit,
+    sama seperti db.get_account_ledger_page.
+    """
+    if account is not None:
+        journal = journal[(journal["akun_debit"] == account) | (journal["akun_kredit"] == account)]
+    if journal.empty:
+        return empty_ledger()
+
+    n = len(journal)
+    amount = journal["jumlah"].to_numpy()
+    zeros = np.zeros(n, dtype=amount.dtype)
+    ledger = pd.DataFrame({
+        "akun": np.concatenate([journal["akun_debit"].to_numpy(), journal["akun_kredit"].to_numpy()]),
+        "id": np.tile(journal["id"].to_numpy(), 2),
+        "tanggal": np.tile(journal["tanggal"].to_numpy(), 2),
+        "keterangan": np.tile(journal["keterangan"].to_numpy(), 2),
+        "debit": np.concatenate([amount, zeros]),
+        "kredit": np.concatenate([zeros, amount]),
+        "sisi": np.repeat(np.array([0, 1], dtype=np.int8), n),
+    })
+    if account is not None:
+        ledger = ledger[ledger["akun"] == account]
+
+    ledger = ledger.sort_values(["akun", "tanggal", "id", "sisi"], kind="stable", ignore_index=True)
+    ledger["saldo"] = (ledger["debit"] - ledger["kredit"]).groupby(ledger["akun"], sort=False).cumsum()
+    return ledger[LEDGER_COLUMNS]
+
+def load_journal_frame():
+    """
+    Seluruh jurnal sebagai satu DataFrame (tanggal tetap ISO agar bisa diurutkan).
+    Jurnal kosong (database baru, atau semua periode sudah diarsip) tetap
+    memberi id dan jumlah bertipe int64.
+    """
+    frames = list(db.iter_journal_frames())
+    journal = pd.concat(frames, ignore_index=True)
+    return journal.astype({"id": "int64", "jumlah": "int64"})
+
+@cached_read
+def load_ledger(account=None):
+    """Buku besar satu akun atau semua akun dari jurnal saat ini; di-cache per versi database."""
+    return build_ledger(load_journal_frame(), account)
+
+def filter_range(df, dari=None, sampai=None):
+    """Baris buku besar dalam rentang tanggal (inklusif); saldo tetap saldo berjalan penuh."""
+    if dari or sampai:
+        df = df[df["tanggal"].between(dari or db.MIN_DATE, sampai or db.MAX_DATE)]
+    return df
+
+def load_ledger_range(dari=None, sampai=None, account=None):
+    """Baris load_ledger dalam rentang tanggal (inklusif)."""
+    return filter_range(load_ledger(account), dari, sampai)
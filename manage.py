@@ -0,0 +1,342 @@
+# manage.py
+# Perintah pemeliharaan database: python manage.py <perintah>
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pandas as pd
+
+import catalog
+import db_manager as db
+import exporter
+import ledger
+import thumbnails
+from migrations import migrate
+
+def _period(value):
+    """Tipe argparse untuk periode YYYY-MM."""
+    if not db.is_valid_period(value):
+        raise argparse.ArgumentTypeError(f"format periode harus YYYY-MM, bukan {value!r}")
+    return value
+
+def verify_balances(args):
+    """Hitung ulang saldo akun dari jurnal dan laporkan selisih dengan account_balances."""
+    drift = db.verify_account_balances(repair=args.repair)
+    if not drift:
+        print("OK: account_balances sesuai dengan jurnal.")
+        return 0
+
+    print(f"Selisih ditemukan pada {len(drift)} akun:")
+    for akun, stored_debit, stored_credit, actual_debit, actual_credit in drift:
+        print(f"- {akun}: tersimpan D={stored_debit} K={stored_credit}, "
+              f"seharusnya D={actual_debit} K={actual_credit}")
+    if args.repair:
+        print("account_balances sudah dibangun ulang.")
+    return 1
+
+def close_period(args):
+    """Tutup periode bulanan (YYYY-MM) atau buka kembali periode terakhir."""
+    ok, msg = db.reopen_last_period() if args.reopen else db.close_period(args.period)
+    print(msg)
+    return 0 if ok else 1
+
+def archive_journal(args):
+    """Pindahkan jurnal periode tertutup ke arsip Parquet per bulan."""
+    ok, result = db.archive_closed_periods(args.through)
+    if not ok:
+        print(result)
+        return 1
+    for month, rows in result:
+        print(f"- {month}: {rows:,} baris diarsip")
+    print(f"Arsip sampai periode {db.get_archived_through()}.")
+    return 0
+
+def warm_thumbnails(args):
+    """Buat semua varian thumbnail untuk gambar katalog dan logo."""
+    if not thumbnails.AVAILABLE:
+        print("Thumbnail membutuhkan paket Pillow (pip install Pillow).")
+        return 1
+    images = [p["image"] for p in catalog.get_catalog().products]
+    images.append(os.path.join(catalog.IMAGES_DIR, "logo.jpg"))
+    start = time.perf_counter()
+    (created, cached, failed), hashes = thumbnails.warm(images, args.widths)
+    print(f"{created} varian dibuat, {cached} sudah ada/tidak perlu, {failed} gambar gagal dibaca "
+          f"({time.perf_counter() - start:.2f} s).")
+    if args.prune:
+        print(f"{thumbnails.prune(hashes)} varian lama dihapus.")
+    return 1 if failed else 0
+
+def _bench_journal_rows(count):
+    """Baris jurnal sintetis untuk benchmark."""
+    accounts = ["Kas", "Persediaan", "Penjualan", "Beban Pokok Penjualan", "Modal", "Piutang"]
+    start = date(2020, 1, 1)
+    rng = random.Random(42)
+    for i in range(count):
+        debit, credit = rng.sample(accounts, 2)
+        yield (
+            (start + timedelta(days=i * 2000 // max(count, 1))).isoformat(),
+            debit, credit, rng.randrange(1000, 5_000_000, 1000), f"Transaksi {i}"
+        )
+
+@contextmanager
+def _temp_db():
+    """Arahkan db_manager ke database sementara yang sudah dimigrasi."""
+    workdir = tempfile.mkdtemp(prefix="chilimate-bench-")
+    original_path = db.DB_PATH
+    db.DB_PATH = os.path.join(workdir, "bench.db")
+    try:
+        migrate()
+        yield workdir
+    finally:
+        db.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+@contextmanager
+def _bench_db(args):
+    """Database sementara berisi args.rows entri jurnal."""
+    with _temp_db() as workdir:
+        start = time.perf_counter()
+        ok, result = db.add_journal_entries_bulk(_bench_journal_rows(args.rows))
+        if not ok:
+            raise SystemExit(result)
+        print(f"Isi {args.rows:,} baris jurnal: {time.perf_counter() - start:.2f} s")
+        yield workdir
+
+def bench_export(args):
+    """Ukur waktu dan puncak memori export jurnal ke CSV/XLSX."""
+    write = exporter.write_xlsx if args.format == "xlsx" else exporter.write_csv
+    with _bench_db(args):
+        start = time.perf_counter()
+        with write(exporter.journal_frames(args.chunk_size)) as f:
+            size = f.seek(0, os.SEEK_END)
+        elapsed = time.perf_counter() - start
+        print(f"Export {args.format}: {elapsed:.2f} s, {size / 1e6:.1f} MB, "
+              f"{args.rows / elapsed:,.0f} baris/detik")
+
+        # Putaran kedua dengan tracemalloc (lebih lambat) untuk puncak alokasi Python
+        tracemalloc.start()
+        with write(exporter.journal_frames(args.chunk_size)):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Puncak memori Python selama export: {peak / 1e6:.1f} MB "
+              f"(chunk {args.chunk_size:,} baris)")
+    return 0
+
+def _legacy_ledger(journal, account):
+    """Buku besar versi lama (iterrows per baris), hanya untuk pembanding benchmark."""
+    rows = []
+    saldo = 0
+    for _, row in journal.sort_values(["tanggal", "id"], kind="stable").iterrows():
+        if row["akun_debit"] == account:
+            saldo += row["jumlah"]
+            rows.append((row["id"], row["tanggal"], row["keterangan"], row["jumlah"], 0, saldo))
+        if row["akun_kredit"] == account:
+            saldo -= row["jumlah"]
+            rows.append((row["id"], row["tanggal"], row["keterangan"], 0, row["jumlah"], saldo))
+    return pd.DataFrame(rows, columns=["id", "tanggal", "keterangan", "debit", "kredit", "saldo"])
+
+def _same_ledger(left, right):
+    left = left[["id", "debit", "kredit", "saldo"]].reset_index(drop=True).astype(float)
+    right = right[["id", "debit", "kredit", "saldo"]].reset_index(drop=True).astype(float)
+    return left.shape == right.shape and ((left - right).abs() < 0.005).all().all()
+
+def bench_ledger(args):
+    """Bandingkan buku besar iterrows lama dengan ledger.build_ledger."""
+    with _bench_db(args):
+        journal = ledger.load_journal_frame()
+        account = args.account
+
+        start = time.perf_counter()
+        legacy = _legacy_ledger(journal, account)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = ledger.build_ledger(journal, account)
+        vector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        everything = ledger.build_ledger(journal)
+        all_time = time.perf_counter() - start
+
+        sql = pd.concat(db.iter_account_ledger_frames(account), ignore_index=True)
+        print(f"Akun {account!r}: {len(vectorized):,} baris")
+        print(f"- iterrows lama:      {legacy_time:.2f} s")
+        print(f"- build_ledger:       {vector_time:.3f} s ({legacy_time / vector_time:,.0f}x)")
+        print(f"- build_ledger semua: {all_time:.3f} s ({len(everything):,} baris, "
+              f"{everything['akun'].nunique()} akun)")
+
+        same = _same_ledger(legacy, vectorized) and _same_ledger(sql, vectorized)
+        print("Hasil identik dengan versi lama dan SQL." if same else "HASIL BERBEDA!")
+        return 0 if same else 1
+
+def _bench_stock_rows(count, products):
+    """
+    Pergerakan stok sintetis (qty, harga_beli, id_barang): barang masuk dengan harga
+    yang naik turun, barang keluar tidak pernah melebihi stok.
+    """
+    rng = random.Random(42)
+    stock = [0] * products
+    price = [rng.randrange(20_000, 80_000, 500) for _ in range(products)]
+    for _ in range(count):
+        item = rng.randrange(products)
+        if stock[item] and rng.random() < 0.5:
+            qty = -rng.randint(1, min(stock[item], 40))
+        else:
+            qty = rng.randint(1, 50)
+            price[item] = max(1000, price[item] + rng.randrange(-2000, 2001, 500))
+        stock[item] += qty
+        yield qty, price[item], item + 1
+
+def _replay_fifo():
+    """Hitung ulang nilai FIFO dan HPP dari seluruh stock_movements (pembanding benchmark)."""
+    layers, value, cogs = {}, {}, {}
+    for item, qty, unit_cost in db._iter_query(
+            "SELECT item_id, qty, unit_cost FROM stock_movements ORDER BY id"):
+        queue = layers.setdefault(item, deque())
+        if qty > 0:
+            queue.append([qty, unit_cost])
+            value[item] = value.get(item, 0) + qty * unit_cost
+            continue
+        need, cost = -qty, 0
+        while need:
+            take = min(need, queue[0][0])
+            cost += take * queue[0][1]
+            need -= take
+            queue[0][0] -= take
+            if not queue[0][0]:
+                queue.popleft()
+        value[item] -= cost
+        cogs[item] = cogs.get(item, 0) + cost
+    return value, cogs
+
+def bench_fifo(args):
+    """Ukur pemeliharaan lapisan FIFO per pergerakan dan biaya laporan nilai persediaan."""
+    with _temp_db():
+        ok, result = db.add_items_bulk((f"B{i}", f"Barang {i}", 0, 0) for i in range(1, args.products + 1))
+        if not ok:
+            raise SystemExit(result)
+
+        start = time.perf_counter()
+        ok, result = db._ingest(
+            "UPDATE inventory SET stock = stock + ?, price = ? WHERE id = ?",
+            _bench_stock_rows(args.movements, args.products), db.BULK_CHUNK_SIZE
+        )
+        if not ok:
+            raise SystemExit(result)
+        elapsed = time.perf_counter() - start
+        print(f"Catat {args.movements:,} pergerakan (lapisan FIFO inkremental): {elapsed:.2f} s, "
+              f"{args.movements / elapsed:,.0f} pergerakan/detik")
+
+        start = time.perf_counter()
+        valuation = db.get_inventory_valuation()
+        report_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        value, cogs = _replay_fifo()
+        replay_time = time.perf_counter() - start
+
+        print(f"Laporan nilai persediaan + HPP ({len(valuation)} barang): {report_time * 1000:.2f} ms")
+        print(f"Hitung ulang FIFO dari seluruh pergerakan: {replay_time:.2f} s "
+              f"({replay_time / report_time:,.0f}x lebih lambat)")
+
+        same = all(
+            nilai == value.get(i, 0) and hpp == cogs.get(i, 0)
+            for i, (_, _, _, nilai, hpp) in enumerate(valuation, start=1)
+        )
+        print("Hasil identik dengan hitung ulang." if same else "HASIL BERBEDA!")
+        return 0 if same else 1
+
+def _bench_products(start, count):
+    """Produk katalog sintetis: kombinasi jenis, warna dan asal cabai."""
+    kinds = ["Cabe Rawit", "Cabe Merah", "Cabe Hijau", "Cabe Keriting", "Paprika", "Bawang", "Tomat"]
+    colors = ["Merah", "Hijau", "Putih", "Oranye", "Kuning"]
+    origins = ["Garut", "Brebes", "Malang", "Kediri", "Magelang", "Karo", "Temanggung"]
+    rng = random.Random(start)
+    for i in range(start, start + count):
+        kind, color, origin = rng.choice(kinds), rng.choice(colors), rng.choice(origins)
+        yield (f"{kind} {color} {origin} #{i}", rng.randrange(5000, 90000, 500), "Vegetables",
+               f"{kind} {color.lower()} dari {origin}, segar per kilogram. Cocok untuk sambal dan tumisan.")
+
+def bench_search(args):
+    """Ukur latensi search_products saat katalog tumbuh."""
+    queries = ["cabe raw", "rawit merah garut", "paprika kuning", "sambal", "bawang b"]
+    sizes = sorted(set(args.sizes))
+    with _temp_db():
+        loaded = 0
+        for size in sizes:
+            ok, result = db._ingest(
+                "INSERT INTO products (name, price, category, description) VALUES (?, ?, ?, ?)",
+                _bench_products(loaded, size - loaded), db.BULK_CHUNK_SIZE
+            )
+            if not ok:
+                raise SystemExit(result)
+            loaded = size
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for query in queries:
+                    db.search_products(query)
+            elapsed = (time.perf_counter() - start) / (args.repeat * len(queries))
+            print(f"{size:>8,} produk: {elapsed * 1000:.2f} ms per pencarian (maks {db.SEARCH_LIMIT} hasil)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perintah pemeliharaan Chili Mate")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("verify-balances", help="cek account_balances terhadap jurnal")
+    cmd.add_argument("--repair", action="store_true", help="bangun ulang jika ada selisih")
+    cmd.set_defaults(func=verify_balances)
+
+    cmd = commands.add_parser("close-period", help="tutup periode bulanan dan simpan snapshot saldo")
+    cmd.add_argument("period", nargs="?", type=_period, help="periode YYYY-MM")
+    cmd.add_argument("--reopen", action="store_true", help="buka kembali periode terakhir")
+    cmd.set_defaults(func=close_period)
+
+    cmd = commands.add_parser("archive-journal", help="pindahkan jurnal periode tertutup ke arsip Parquet")
+    cmd.add_argument("--through", type=_period, help="periode terakhir yang diarsip (YYYY-MM); default periode tertutup terakhir")
+    cmd.set_defaults(func=archive_journal)
+
+    cmd = commands.add_parser("warm-thumbnails", help="buat thumbnail semua gambar katalog")
+    cmd.add_argument("--widths", type=int, nargs="+", default=list(thumbnails.WIDTHS))
+    cmd.add_argument("--prune", action="store_true", help="hapus varian dari gambar yang sudah tidak dipakai")
+    cmd.set_defaults(func=warm_thumbnails)
+
+    cmd = commands.add_parser("bench-export", help="benchmark export jurnal pada database sementara")
+    cmd.add_argument("--rows", type=int, default=1_000_000)
+    cmd.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    cmd.add_argument("--chunk-size", type=int, default=db.STREAM_CHUNK_SIZE)
+    cmd.set_defaults(func=bench_export)
+
+    cmd = commands.add_parser("bench-ledger", help="benchmark buku besar iterrows vs tervektorisasi")
+    cmd.add_argument("--rows", type=int, default=200_000)
+    cmd.add_argument("--account", default="Kas")
+    cmd.set_defaults(func=bench_ledger)
+
+    cmd = commands.add_parser("bench-fifo", help="benchmark nilai persediaan FIFO inkremental")
+    cmd.add_argument("--movements", type=int, default=1_000_000)
+    cmd.add_argument("--products", type=int, default=50)
+    cmd.set_defaults(func=bench_fifo)
+
+    cmd = commands.add_parser("bench-search", help="benchmark pencarian produk FTS5")
+    cmd.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    cmd.add_argument("--repeat", type=int, default=20)
+    cmd.set_defaults(func=bench_search)
+
+    args = parser.parse_args(argv)
+    if args.command == "close-period" and not (args.period or args.reopen):
+        parser.error("close-period membutuhkan periode YYYY-MM atau --reopen")
+    migrate()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,811 @@
+# migrations.py
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import archive
+import db_manager as db
+from products import products as SEED_PRODUCTS
+
+# Daftar migrasi skema: (versi, deskripsi, fungsi(conn)).
+# Migrasi baru selalu ditambahkan di akhir dengan versi yang lebih besar.
+MIGRATIONS = []
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+def _table_exists(conn, name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+@migration(1, "Skema kanonik inventory + journal, gabungkan items dan jurnal_umum")
+def _canonical_schema(conn):
+    # inventory: satu tabel barang (kode dari items, name/stock/price dari app)
+    if _table_exists(conn, "inventory"):
+        conn.execute("ALTER TABLE inventory RENAME TO inventory_old")
+    conn.execute("""
+        CREATE TABLE inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kode TEXT UNIQUE,
+            name TEXT UNIQUE NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0 CHECK (stock >= 0),
+            price REAL NOT NULL DEFAULT 0
+        )
+    """)
+    if _table_exists(conn, "inventory_old"):
+        # Tabel lama tidak punya UNIQUE(name); nama ganda digabung
+        conn.execute("""
+            INSERT INTO inventory (id, name, stock, price)
+            SELECT MIN(id), name, MAX(SUM(stock), 0), MAX(price)
+            FROM inventory_old
+            GROUP BY name
+        """)
+        conn.execute("DROP TABLE inventory_old")
+
+    if _table_exists(conn, "items"):
+        # Sebagian baris lama tersimpan dengan kode/nama tertukar
+        # (nama berisi angka, kode berisi nama barang); dibalik dulu.
+        conn.execute("""
+            CREATE TEMP TABLE items_norm AS
+            SELECT CASE WHEN swapped THEN nama ELSE kode END AS kode,
+                   CASE WHEN swapped THEN kode ELSE nama END AS nama,
+                   stok, harga
+            FROM (
+                SELECT *, (nama GLOB '[0-9]*' AND NOT kode GLOB '[0-9]*') AS swapped
+                FROM items
+            )
+        """)
+        # Barang yang sudah ada di inventory hanya mendapat kode;
+        # stok inventory tetap dipakai karena itulah yang ditampilkan dan dikurangi app.
+        conn.execute("""
+            UPDATE inventory
+            SET kode = (SELECT kode FROM items_norm WHERE items_norm.nama = inventory.name)
+            WHERE kode IS NULL
+              AND name IN (SELECT nama FROM items_norm)
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO inventory (kode, name, stock, price)
+            SELECT kode, COALESCE(nama, kode), MAX(COALESCE(stok, 0), 0), COALESCE(harga, 0)
+            FROM items_norm
+            WHERE COALESCE(nama, kode) NOT IN (SELECT name FROM inventory)
+        """)
+        conn.execute("DROP TABLE items_norm")
+        conn.execute("DROP TABLE items")
+
+    # journal: satu tabel jurnal umum
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            debit_account TEXT NOT NULL,
+            credit_account TEXT NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT
+        )
+    """)
+    if _table_exists(conn, "jurnal_umum"):
+        conn.execute("""
+            INSERT INTO journal (date, debit_account, credit_account, amount, description)
+            SELECT tanggal, COALESCE(akun_debit, ''), COALESCE(akun_kredit, ''),
+                   COALESCE(jumlah, 0), keterangan
+            FROM jurnal_umum
+            ORDER BY id
+        """)
+        conn.execute("DROP TABLE jurnal_umum")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_date ON journal(date, id)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS buku_besar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tanggal TEXT,
+            keterangan TEXT,
+            debit REAL,
+            kredit REAL
+        )
+    """)
+
+
+@migration(2, "Indeks akun debit/kredit untuk buku besar per akun")
+def _journal_account_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_debit ON journal(debit_account, date, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_credit ON journal(credit_account, date, id)")
+
+
+ACCOUNT_BALANCE_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_insert AFTER INSERT ON journal
+    BEGIN
+        INSERT INTO account_balances (account, debit) VALUES (NEW.debit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET debit = debit + excluded.debit;
+        INSERT INTO account_balances (account, credit) VALUES (NEW.credit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET credit = credit + excluded.credit;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_delete AFTER DELETE ON journal
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account = OLD.debit_account;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account = OLD.credit_account;
+        DELETE FROM account_balances
+        WHERE account IN (OLD.debit_account, OLD.credit_account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE debit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE credit_account = account);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_update
+    AFTER UPDATE OF debit_account, credit_account, amount ON journal
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account = OLD.debit_account;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account = OLD.credit_account;
+        INSERT INTO account_balances (account, debit) VALUES (NEW.debit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET debit = debit + excluded.debit;
+        INSERT INTO account_balances (account, credit) VALUES (NEW.credit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET credit = credit + excluded.credit;
+        DELETE FROM account_balances
+        WHERE account IN (OLD.debit_account, OLD.credit_account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE debit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE credit_account = account);
+    END;
+"""
+
+def _execute_script(conn, script):
+    """Jalankan beberapa statement (termasuk trigger) tanpa executescript, yang selalu commit."""
+    statement = ""
+    for line in script.strip().splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+@migration(3, "Tabel account_balances yang dijaga trigger untuk Neraca Saldo")
+def _account_balances(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS account_balances (
+            account TEXT PRIMARY KEY,
+            debit REAL NOT NULL DEFAULT 0,
+            credit REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        INSERT INTO account_balances (account, debit, credit)
+        SELECT account, SUM(debit), SUM(credit)
+        FROM (
+            SELECT debit_account AS account, amount AS debit, 0 AS credit FROM journal
+            UNION ALL
+            SELECT credit_account, 0, amount FROM journal
+        )
+        GROUP BY account
+    """)
+    _execute_script(conn, ACCOUNT_BALANCE_TRIGGERS)
+
+
+PERIOD_LOCK_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_journal_lock_insert BEFORE INSERT ON journal
+    WHEN substr(NEW.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+    BEGIN
+        SELECT RAISE(ABORT, 'Periode akuntansi sudah ditutup; entri jurnal tidak bisa ditambahkan');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_lock_update BEFORE UPDATE ON journal
+    WHEN substr(OLD.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+      OR substr(NEW.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+    BEGIN
+        SELECT RAISE(ABORT, 'Periode akuntansi sudah ditutup; entri jurnal tidak bisa diubah');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_lock_delete BEFORE DELETE ON journal
+    WHEN substr(OLD.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+    BEGIN
+        SELECT RAISE(ABORT, 'Periode akuntansi sudah ditutup; entri jurnal tidak bisa dihapus');
+    END;
+"""
+
+@migration(4, "Tutup periode bulanan: snapshot saldo akun dan kunci jurnal periode tertutup")
+def _period_close(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS period_closes (
+            period TEXT PRIMARY KEY,
+            closed_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS period_balances (
+            period TEXT NOT NULL REFERENCES period_closes(period),
+            account TEXT NOT NULL,
+            debit REAL NOT NULL DEFAULT 0,
+            credit REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, account)
+        ) WITHOUT ROWID
+    """)
+    _execute_script(conn, PERIOD_LOCK_TRIGGERS)
+
+
+# Versi trigger untuk arsip Parquet: penghapusan saat archive_state.archiving = 1
+# dilewati (baris yang diarsip tetap terhitung di account_balances dan boleh dihapus
+# walaupun periodenya sudah ditutup), dan akun yang masih punya saldo di arsip
+# tidak ikut dihapus dari account_balances.
+ARCHIVE_AWARE_TRIGGERS = """
+    DROP TRIGGER IF EXISTS trg_journal_lock_delete;
+    CREATE TRIGGER trg_journal_lock_delete BEFORE DELETE ON journal
+    WHEN substr(OLD.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+     AND (SELECT archiving FROM archive_state) = 0
+    BEGIN
+        SELECT RAISE(ABORT, 'Periode akuntansi sudah ditutup; entri jurnal tidak bisa dihapus');
+    END;
+
+    DROP TRIGGER IF EXISTS trg_journal_balance_delete;
+    CREATE TRIGGER trg_journal_balance_delete AFTER DELETE ON journal
+    WHEN (SELECT archiving FROM archive_state) = 0
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account = OLD.debit_account;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account = OLD.credit_account;
+        DELETE FROM account_balances
+        WHERE account IN (OLD.debit_account, OLD.credit_account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE debit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE credit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM period_balances
+                          WHERE period = (SELECT MAX(period) FROM archived_periods)
+                            AND period_balances.account = account_balances.account);
+    END;
+
+    DROP TRIGGER IF EXISTS trg_journal_balance_update;
+    CREATE TRIGGER trg_journal_balance_update
+    AFTER UPDATE OF debit_account, credit_account, amount ON journal
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account = OLD.debit_account;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account = OLD.credit_account;
+        INSERT INTO account_balances (account, debit) VALUES (NEW.debit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET debit = debit + excluded.debit;
+        INSERT INTO account_balances (account, credit) VALUES (NEW.credit_account, NEW.amount)
+            ON CONFLICT(account) DO UPDATE SET credit = credit + excluded.credit;
+        DELETE FROM account_balances
+        WHERE account IN (OLD.debit_account, OLD.credit_account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE debit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM journal WHERE credit_account = account)
+          AND NOT EXISTS (SELECT 1 FROM period_balances
+                          WHERE period = (SELECT MAX(period) FROM archived_periods)
+                            AND period_balances.account = account_balances.account);
+    END;
+"""
+
+@migration(5, "Arsip Parquet untuk jurnal periode tertutup")
+def _journal_archive(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_periods (
+            period TEXT PRIMARY KEY REFERENCES period_closes(period),
+            archived_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS archive_state (archiving INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("INSERT INTO archive_state (archiving) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM archive_state)")
+    _execute_script(conn, ARCHIVE_AWARE_TRIGGERS)
+
+
+def _rebuild_table(conn, name, create_sql, select_sql):
+    """
+    Ganti skema tabel dengan membangun ulang (SQLite tidak bisa mengubah tipe kolom).
+    create_sql memakai {name} untuk nama tabel baru; indeks dan trigger dibuat ulang pemanggil.
+    """
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,)).fetchone()
+    conn.execute(create_sql.format(name=f"{name}_new"))
+    conn.execute(f"INSERT INTO {name}_new {select_sql}")
+    conn.execute(f"DROP TABLE {name}")
+    conn.execute(f"ALTER TABLE {name}_new RENAME TO {name}")
+    if seq is not None:
+        # id yang sudah pernah dipakai (termasuk baris di arsip) tidak boleh dipakai ulang
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq[0], name))
+
+@migration(6, "Uang sebagai INTEGER Rupiah di inventory, journal, saldo akun dan snapshot periode")
+def _integer_rupiah(conn):
+    _rebuild_table(conn, "inventory", """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kode TEXT UNIQUE,
+            name TEXT UNIQUE NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0 CHECK (stock >= 0),
+            price INTEGER NOT NULL DEFAULT 0 CHECK (typeof(price) = 'integer')
+        )
+    """, "SELECT id, kode, name, stock, CAST(ROUND(price) AS INTEGER) FROM inventory")
+
+    _rebuild_table(conn, "journal", """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            debit_account TEXT NOT NULL,
+            credit_account TEXT NOT NULL,
+            amount INTEGER NOT NULL CHECK (typeof(amount) = 'integer'),
+            description TEXT
+        )
+    """, """
+        SELECT id, date, debit_account, credit_account, CAST(ROUND(amount) AS INTEGER), description
+        FROM journal
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_date ON journal(date, id)")
+    _journal_account_indexes(conn)
+
+    _rebuild_table(conn, "account_balances", """
+        CREATE TABLE {name} (
+            account TEXT PRIMARY KEY,
+            debit INTEGER NOT NULL DEFAULT 0,
+            credit INTEGER NOT NULL DEFAULT 0
+        )
+    """, "SELECT account, CAST(ROUND(debit) AS INTEGER), CAST(ROUND(credit) AS INTEGER) FROM account_balances")
+
+    _rebuild_table(conn, "period_balances", """
+        CREATE TABLE {name} (
+            period TEXT NOT NULL REFERENCES period_closes(period),
+            account TEXT NOT NULL,
+            debit INTEGER NOT NULL DEFAULT 0,
+            credit INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, account)
+        ) WITHOUT ROWID
+    """, """
+        SELECT period, account, CAST(ROUND(debit) AS INTEGER), CAST(ROUND(credit) AS INTEGER)
+        FROM period_balances
+    """)
+
+    _rebuild_table(conn, "buku_besar", """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tanggal TEXT,
+            keterangan TEXT,
+            debit INTEGER,
+            kredit INTEGER
+        )
+    """, "SELECT id, tanggal, keterangan, CAST(ROUND(debit) AS INTEGER), CAST(ROUND(kredit) AS INTEGER) FROM buku_besar")
+
+    # Trigger journal ikut terhapus bersama tabel lama
+    _execute_script(conn, ACCOUNT_BALANCE_TRIGGERS)
+    _execute_script(conn, PERIOD_LOCK_TRIGGERS)
+    _execute_script(conn, ARCHIVE_AWARE_TRIGGERS)
+
+
+DEFAULT_ACCOUNTS = [
+    ("Kas", "aset"),
+    ("Piutang", "aset"),
+    ("Persediaan", "aset"),
+    ("Utang", "kewajiban"),
+    ("Modal", "modal"),
+    ("Penjualan", "pendapatan"),
+    ("Beban Pokok Penjualan", "beban"),
+]
+
+def _guess_account_type(name):
+    """Tipe untuk akun lama yang belum ada di bagan akun standar, dari awalan namanya."""
+    lowered = name.lower()
+    for prefix, account_type in (("beban", "beban"), ("biaya", "beban"), ("pendapatan", "pendapatan"),
+                                 ("penjualan", "pendapatan"), ("utang", "kewajiban"), ("modal", "modal"),
+                                 ("prive", "modal")):
+        if lowered.startswith(prefix):
+            return account_type
+    return "aset"
+
+# Trigger journal berbasis id akun (versi arsip tetap berlaku untuk penghapusan)
+ACCOUNT_ID_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_insert AFTER INSERT ON journal
+    BEGIN
+        INSERT INTO account_balances (account_id, debit) VALUES (NEW.debit_account_id, NEW.amount)
+            ON CONFLICT(account_id) DO UPDATE SET debit = debit + excluded.debit;
+        INSERT INTO account_balances (account_id, credit) VALUES (NEW.credit_account_id, NEW.amount)
+            ON CONFLICT(account_id) DO UPDATE SET credit = credit + excluded.credit;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_delete AFTER DELETE ON journal
+    WHEN (SELECT archiving FROM archive_state) = 0
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account_id = OLD.debit_account_id;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account_id = OLD.credit_account_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_balance_update
+    AFTER UPDATE OF debit_account_id, credit_account_id, amount ON journal
+    BEGIN
+        UPDATE account_balances SET debit = debit - OLD.amount WHERE account_id = OLD.debit_account_id;
+        UPDATE account_balances SET credit = credit - OLD.amount WHERE account_id = OLD.credit_account_id;
+        INSERT INTO account_balances (account_id, debit) VALUES (NEW.debit_account_id, NEW.amount)
+            ON CONFLICT(account_id) DO UPDATE SET debit = debit + excluded.debit;
+        INSERT INTO account_balances (account_id, credit) VALUES (NEW.credit_account_id, NEW.amount)
+            ON CONFLICT(account_id) DO UPDATE SET credit = credit + excluded.credit;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_journal_lock_delete BEFORE DELETE ON journal
+    WHEN substr(OLD.date, 1, 7) <= (SELECT MAX(period) FROM period_closes)
+     AND (SELECT archiving FROM archive_state) = 0
+    BEGIN
+        SELECT RAISE(ABORT, 'Periode akuntansi sudah ditutup; entri jurnal tidak bisa dihapus');
+    END;
+"""
+
+@migration(7, "Bagan akun (id integer + tipe akun); journal dan saldo merujuk id akun")
+def _chart_of_accounts(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            type TEXT NOT NULL CHECK (type IN ({", ".join(f"'{t}'" for t in db.ACCOUNT_TYPES)}))
+        )
+    """)
+    # Akun standar dulu, lalu nama lama; variasi huruf besar/kecil ("kas") digabung ke akun yang sama
+    names = [r[0] for r in conn.execute("""
+        SELECT name FROM (
+            SELECT debit_account AS name, MIN(id) AS first_id FROM journal GROUP BY debit_account
+            UNION ALL
+            SELECT credit_account, MIN(id) FROM journal GROUP BY credit_account
+            UNION ALL
+            SELECT account, NULL FROM account_balances
+        )
+        GROUP BY name
+        ORDER BY MIN(first_id) IS NULL, MIN(first_id)
+    """)]
+    conn.executemany(
+        "INSERT OR IGNORE INTO accounts (name, type) VALUES (?, ?)",
+        DEFAULT_ACCOUNTS + [(name, _guess_account_type(name)) for name in names]
+    )
+
+    _rebuild_table(conn, "journal", """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            debit_account_id INTEGER NOT NULL REFERENCES accounts(id),
+            credit_account_id INTEGER NOT NULL REFERENCES accounts(id),
+            amount INTEGER NOT NULL CHECK (typeof(amount) = 'integer'),
+            description TEXT
+        )
+    """, """
+        SELECT j.id, j.date, d.id, k.id, j.amount, j.description
+        FROM journal j
+        JOIN accounts d ON d.name = j.debit_account
+        JOIN accounts k ON k.name = j.credit_account
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_date ON journal(date, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_debit ON journal(debit_account_id, date, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_credit ON journal(credit_account_id, date, id)")
+
+    _rebuild_table(conn, "account_balances", """
+        CREATE TABLE {name} (
+            account_id INTEGER PRIMARY KEY REFERENCES accounts(id),
+            debit INTEGER NOT NULL DEFAULT 0,
+            credit INTEGER NOT NULL DEFAULT 0
+        )
+    """, """
+        SELECT a.id, SUM(b.debit), SUM(b.credit)
+        FROM account_balances b JOIN accounts a ON a.name = b.account
+        GROUP BY a.id
+    """)
+
+    _rebuild_table(conn, "period_balances", """
+        CREATE TABLE {name} (
+            period TEXT NOT NULL REFERENCES period_closes(period),
+            account_id INTEGER NOT NULL REFERENCES accounts(id),
+            debit INTEGER NOT NULL DEFAULT 0,
+            credit INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, account_id)
+        ) WITHOUT ROWID
+    """, """
+        SELECT p.period, a.id, SUM(p.debit), SUM(p.credit)
+        FROM period_balances p JOIN accounts a ON a.name = p.account
+        GROUP BY p.period, a.id
+    """)
+
+    _execute_script(conn, ACCOUNT_ID_TRIGGERS)
+    _execute_script(conn, PERIOD_LOCK_TRIGGERS)
+    _canonicalize_archived_accounts(conn)
+
+def _canonicalize_archived_accounts(conn):
+    """Partisi arsip menyimpan nama akun; samakan ejaannya dengan bagan akun."""
+    canonical = {name.lower(): name for (name,) in conn.execute("SELECT name FROM accounts")}
+    for month in archive.list_partitions(db.DB_PATH):
+        frame = archive.read(db.DB_PATH, [month])
+        renamed = frame.copy()
+        for column in ("akun_debit", "akun_kredit"):
+            renamed[column] = frame[column].str.lower().map(canonical).fillna(frame[column])
+        if not renamed.equals(frame):
+            archive.write_partition(db.DB_PATH, month, renamed)
+
+# Setiap perubahan inventory.stock dicatat trigger sebagai baris stock_movements
+# (seq berurutan per barang); tiap STOCK_CHECKPOINT_INTERVAL pergerakan disimpan
+# checkpoint stok barang itu. Log pergerakan hanya bisa ditambah.
+STOCK_MOVEMENT_TRIGGERS = f"""
+    CREATE TRIGGER IF NOT EXISTS trg_inventory_movement_insert AFTER INSERT ON inventory
+    WHEN NEW.stock <> 0
+    BEGIN
+        INSERT INTO stock_movements (item_id, seq, moved_at, qty)
+        VALUES (NEW.id, 1, {db.STOCK_TIMESTAMP_SQL}, NEW.stock);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_inventory_movement_update AFTER UPDATE OF stock ON inventory
+    WHEN NEW.stock <> OLD.stock
+    BEGIN
+        INSERT INTO stock_movements (item_id, seq, moved_at, qty)
+        VALUES (NEW.id,
+                COALESCE((SELECT MAX(seq) FROM stock_movements WHERE item_id = NEW.id), 0) + 1,
+                {db.STOCK_TIMESTAMP_SQL}, NEW.stock - OLD.stock);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_stock_checkpoint AFTER INSERT ON stock_movements
+    WHEN NEW.seq % {db.STOCK_CHECKPOINT_INTERVAL} = 0
+    BEGIN
+        INSERT INTO stock_checkpoints (item_id, seq, moved_at, stock)
+        SELECT NEW.item_id, NEW.seq, NEW.moved_at, stock FROM inventory WHERE id = NEW.item_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_stock_movements_no_update BEFORE UPDATE ON stock_movements
+    BEGIN
+        SELECT RAISE(ABORT, 'Riwayat stok tidak bisa diubah');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_stock_movements_no_delete BEFORE DELETE ON stock_movements
+    BEGIN
+        SELECT RAISE(ABORT, 'Riwayat stok tidak bisa dihapus');
+    END;
+"""
+
+@migration(8, "Log pergerakan stok (append-only) dengan checkpoint stok per barang")
+def _stock_movements(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL REFERENCES inventory(id),
+            seq INTEGER NOT NULL,
+            moved_at TEXT NOT NULL,
+            qty INTEGER NOT NULL,
+            UNIQUE (item_id, seq)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_checkpoints (
+            item_id INTEGER NOT NULL REFERENCES inventory(id),
+            seq INTEGER NOT NULL,
+            moved_at TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            PRIMARY KEY (item_id, seq)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_checkpoints_time ON stock_checkpoints(item_id, moved_at, seq)")
+    # Riwayat sebelum log dimulai tidak diketahui: stok saat ini menjadi pergerakan pembuka
+    conn.execute(f"""
+        INSERT INTO stock_movements (item_id, seq, moved_at, qty)
+        SELECT id, 1, {db.STOCK_TIMESTAMP_SQL}, stock FROM inventory WHERE stock <> 0
+    """)
+    _execute_script(conn, STOCK_MOVEMENT_TRIGGERS)
+
+# Biaya FIFO untuk mengeluarkan {qty} unit barang {item}: lapisan terbuka dipakai
+# dari yang paling lama; before = unit di lapisan-lapisan yang lebih lama
+def _fifo_takes(item, qty):
+    return f"""
+        SELECT id, unit_cost, MIN(qty_remaining, MAX({qty} - before, 0)) AS take
+        FROM (
+            SELECT id, unit_cost, qty_remaining,
+                   SUM(qty_remaining) OVER (ORDER BY id ROWS UNBOUNDED PRECEDING) - qty_remaining AS before
+            FROM (
+                -- setiap lapisan terbuka berisi minimal satu unit, jadi cukup {qty} lapisan tertua
+                SELECT id, unit_cost, qty_remaining FROM cost_layers
+                WHERE item_id = {item} AND qty_remaining > 0
+                ORDER BY id
+                LIMIT {qty}
+            )
+        )
+    """
+
+# Pergerakan membawa nilai: barang masuk dinilai harga saat itu dan membuka lapisan
+# biaya baru, barang keluar dinilai FIFO dan mengurangi lapisan tertua.
+# stock_valuation menyimpan nilai persediaan dan HPP kumulatif per barang.
+FIFO_TRIGGERS = f"""
+    DROP TRIGGER IF EXISTS trg_inventory_movement_insert;
+    CREATE TRIGGER trg_inventory_movement_insert AFTER INSERT ON inventory
+    WHEN NEW.stock <> 0
+    BEGIN
+        INSERT INTO stock_movements (item_id, seq, moved_at, qty, unit_cost, value)
+        VALUES (NEW.id, 1, {db.STOCK_TIMESTAMP_SQL}, NEW.stock, NEW.price, NEW.stock * NEW.price);
+    END;
+
+    DROP TRIGGER IF EXISTS trg_inventory_movement_update;
+    CREATE TRIGGER trg_inventory_movement_update AFTER UPDATE OF stock ON inventory
+    WHEN NEW.stock <> OLD.stock
+    BEGIN
+        INSERT INTO stock_movements (item_id, seq, moved_at, qty, unit_cost, value)
+        VALUES (NEW.id,
+                COALESCE((SELECT MAX(seq) FROM stock_movements WHERE item_id = NEW.id), 0) + 1,
+                {db.STOCK_TIMESTAMP_SQL}, NEW.stock - OLD.stock,
+                CASE WHEN NEW.stock > OLD.stock THEN NEW.price END,
+                CASE WHEN NEW.stock > OLD.stock THEN (NEW.stock - OLD.stock) * NEW.price
+                     ELSE -(SELECT COALESCE(SUM(take * unit_cost), 0)
+                            FROM ({_fifo_takes("NEW.id", "OLD.stock - NEW.stock")}))
+                END);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_cost_layer_receive AFTER INSERT ON stock_movements
+    WHEN NEW.qty > 0
+    BEGIN
+        INSERT INTO cost_layers (item_id, movement_id, unit_cost, qty_received, qty_remaining)
+        VALUES (NEW.item_id, NEW.id, NEW.unit_cost, NEW.qty, NEW.qty);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_cost_layer_issue AFTER INSERT ON stock_movements
+    WHEN NEW.qty < 0
+    BEGIN
+        UPDATE cost_layers SET qty_remaining = qty_remaining - t.take
+        FROM ({_fifo_takes("NEW.item_id", "-NEW.qty")}) t
+        WHERE cost_layers.id = t.id AND t.take > 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_stock_valuation AFTER INSERT ON stock_movements
+    BEGIN
+        INSERT INTO stock_valuation (item_id, value, cogs)
+        VALUES (NEW.item_id, NEW.value, CASE WHEN NEW.qty < 0 THEN -NEW.value ELSE 0 END)
+            ON CONFLICT(item_id) DO UPDATE SET
+                value = value + excluded.value,
+                cogs = cogs + excluded.cogs;
+    END;
+"""
+
+@migration(9, "Lapisan biaya FIFO dan nilai persediaan inkremental per barang")
+def _fifo_valuation(conn):
+    conn.execute("ALTER TABLE stock_movements ADD COLUMN unit_cost INTEGER")
+    conn.execute("ALTER TABLE stock_movements ADD COLUMN value INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cost_layers (
+            id INTEGER PRIMARY KEY,
+            item_id INTEGER NOT NULL REFERENCES inventory(id),
+            movement_id INTEGER REFERENCES stock_movements(id),
+            unit_cost INTEGER NOT NULL,
+            qty_received INTEGER NOT NULL,
+            qty_remaining INTEGER NOT NULL CHECK (qty_remaining >= 0)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_layers_open ON cost_layers(item_id, id) WHERE qty_remaining > 0")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_valuation (
+            item_id INTEGER PRIMARY KEY REFERENCES inventory(id),
+            value INTEGER NOT NULL DEFAULT 0,
+            cogs INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Harga beli stok lama tidak tercatat: stok saat ini menjadi satu lapisan pembuka
+    # dengan harga barang sekarang
+    conn.execute("""
+        INSERT INTO cost_layers (item_id, unit_cost, qty_received, qty_remaining)
+        SELECT id, price, stock, stock FROM inventory WHERE stock > 0 ORDER BY id
+    """)
+    conn.execute("INSERT INTO stock_valuation (item_id, value) SELECT id, stock * price FROM inventory")
+    _execute_script(conn, FIFO_TRIGGERS)
+
+# Setiap perubahan katalog menaikkan catalog_version; objek katalog di memori
+# dimuat ulang hanya jika versinya berubah
+CATALOG_VERSION_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_products_version_insert AFTER INSERT ON products
+    BEGIN
+        UPDATE catalog_version SET version = version + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_products_version_update AFTER UPDATE ON products
+    BEGIN
+        UPDATE catalog_version SET version = version + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_products_version_delete AFTER DELETE ON products
+    BEGIN
+        UPDATE catalog_version SET version = version + 1;
+    END;
+"""
+
+@migration(10, "Katalog toko di tabel products (diisi dari products.py) dengan catalog_version")
+def _product_catalog(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            price INTEGER NOT NULL CHECK (typeof(price) = 'integer' AND price >= 0),
+            category TEXT NOT NULL,
+            description TEXT,
+            image TEXT,
+            rating REAL,
+            featured INTEGER NOT NULL DEFAULT 0,
+            in_stock INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_category_price ON products(category, price)")
+    conn.execute("CREATE TABLE IF NOT EXISTS catalog_version (version INTEGER NOT NULL)")
+    conn.execute("INSERT INTO catalog_version (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM catalog_version)")
+    # Gambar disimpan sebagai nama file di folder images
+    conn.executemany("""
+        INSERT OR IGNORE INTO products (name, price, category, description, image, rating, featured, in_stock)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (p["name"], db.to_rupiah(p["price"]), p["category"], p.get("description"),
+         os.path.basename(p["image"]) if p.get("image") else None, p.get("rating"),
+         int(p.get("featured", False)), int(p.get("in stock", True)))
+        for p in SEED_PRODUCTS
+    ])
+    _execute_script(conn, CATALOG_VERSION_TRIGGERS)
+
+# Indeks FTS5 external-content atas products: baris indeks dijaga trigger,
+# teks produk tetap hanya disimpan sekali di tabel products
+PRODUCT_SEARCH_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert AFTER INSERT ON products
+    BEGIN
+        INSERT INTO products_fts (rowid, name, description, category)
+        VALUES (NEW.id, NEW.name, NEW.description, NEW.category);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete AFTER DELETE ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, category)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.category);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_update
+    AFTER UPDATE OF name, description, category ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, category)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.category);
+        INSERT INTO products_fts (rowid, name, description, category)
+        VALUES (NEW.id, NEW.name, NEW.description, NEW.category);
+    END;
+"""
+
+@migration(11, "Pencarian produk full-text (FTS5) atas nama, deskripsi dan kategori")
+def _product_search(conn):
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, category,
+                content = 'products', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite tanpa FTS5: db.search_products memakai pencarian LIKE
+        return
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    _execute_script(conn, PRODUCT_SEARCH_TRIGGERS)
+
+
+_lock = threading.Lock()
+_migrated_path = None
+
+def current_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate():
+    """
+    Jalankan migrasi yang belum diterapkan, sekali per proses.
+    Panggilan berikutnya (setiap rerun Streamlit) langsung kembali tanpa DDL.
+    Return versi skema saat ini.
+    """
+    global _migrated_path
+    if _migrated_path == db.DB_PATH:
+        return MIGRATIONS[-1][0]
+
+    with _lock:
+        if _migrated_path == db.DB_PATH:
+            return MIGRATIONS[-1][0]
+
+        with db.transaction(immediate=True) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TEXT
+                )
+            """)
+            version = current_version(conn)
+            for number, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+                if number <= version:
+                    continue
+                fn(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (number, description, datetime.now().isoformat(timespec="seconds"))
+                )
+                version = number
+
+        _migrated_path = db.DB_PATH
+        return version
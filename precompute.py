@@ -0,0 +1,180 @@
+# precompute.py
+# Worker latar belakang bersama untuk seluruh sesi dalam satu proses. Laporan berat
+# (neraca saldo, buku besar semua akun, nilai persediaan) dihitung ulang di thread
+# pool dengan debounce, dan halaman langsung membaca hasil terakhir yang sudah selesai.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+import db_manager as db
+import ledger
+
+DEBOUNCE_SECONDS = 1.0
+MAX_WORKERS = 2
+
+def _inventory_valuation():
+    return pd.concat(db.iter_valuation_frames(), ignore_index=True)
+
+# Nama laporan -> fungsi tanpa argumen yang membangunnya
+REPORTS = {
+    "trial_balance": db.get_trial_balance,
+    "ledger": ledger.load_ledger,
+    "inventory": _inventory_valuation,
+}
+
+class Result:
+    """Hasil satu laporan beserta versi database saat mulai dihitung."""
+    __slots__ = ("value", "path", "token", "computed_at", "seconds")
+
+    def __init__(self, value, path, token, computed_at, seconds):
+        self.value = value
+        self.path = path
+        self.token = token
+        self.computed_at = computed_at
+        self.seconds = seconds
+
+class Precomputer:
+    """
+    Thread pool dengan debounce: beberapa tulisan berturut-turut dalam DEBOUNCE_SECONDS
+    hanya memicu satu putaran hitung ulang. Laporan yang sedang dihitung saat ada
+    tulisan baru ditandai kotor dan dihitung ulang begitu selesai.
+    """
+
+    def __init__(self, reports, debounce=DEBOUNCE_SECONDS, max_workers=MAX_WORKERS):
+        self.reports = reports
+        self.debounce = debounce
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="precompute")
+        self._lock = threading.Lock()
+        self._timer = None
+        self._results = {}   # nama -> Result
+        self._errors = {}    # nama -> (exception, path, token) dari hitungan terakhir yang gagal
+        self._running = {}   # nama -> Future
+        self._dirty = set()
+        self._round = set()  # laporan dalam putaran hitung ulang yang sedang berjalan
+        self._done = set()
+
+    def request_refresh(self, names=None, delay=None):
+        """Jadwalkan hitung ulang (default semua laporan) setelah jeda debounce."""
+        names = set(self.reports if names is None else names)
+        delay = self.debounce if delay is None else delay
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                names |= self._timer.args[0]
+            self._timer = threading.Timer(delay, self._submit, args=(names,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _submit(self, names):
+        with self._lock:
+            if self._timer is not None and self._timer.args[0] is names:
+                self._timer = None
+            if not self._running:
+                self._round, self._done = set(), set()
+            for name in names:
+                self._round.add(name)
+                self._done.discard(name)
+                if name in self._running:
+                    self._dirty.add(name)
+                else:
+                    self._errors.pop(name, None)
+                    self._running[name] = self._executor.submit(self._compute, name)
+
+    def _compute(self, name):
+        path, token = db.DB_PATH, db.change_token()
+        start = time.perf_counter()
+        try:
+            value = self.reports[name]()
+        except BaseException as e:
+            with self._lock:
+                self._errors[name] = (e, path, token)
+                del self._running[name]
+                self._dirty.discard(name)
+                self._done.add(name)
+            raise
+        result = Result(value, path, token, datetime.now(), time.perf_counter() - start)
+        with self._lock:
+            self._results[name] = result
+            del self._running[name]
+            rerun = name in self._dirty
+            self._dirty.discard(name)
+            if not rerun:
+                self._done.add(name)
+        if rerun:
+            self._submit({name})
+        return value
+
+    def latest(self, name, wait=True):
+        """
+        Hasil terakhir yang sudah selesai untuk database saat ini. Jika database sudah
+        berubah sejak hasil itu dihitung (misalnya ditulis proses lain), hitung ulang
+        dijadwalkan, kecuali hitungan untuk versi database yang sama sudah gagal.
+        Tanpa hasil sama sekali, wait=True menunggu hitungan pertama dan melempar
+        ulang exception-nya jika hitungan itu gagal.
+        """
+        result = self._results.get(name)
+        if result is not None and result.path != db.DB_PATH:
+            result = None
+        if result is None or result.token != db.change_token():
+            with self._lock:
+                pending = name in self._running or (self._timer is not None and name in self._timer.args[0])
+            if not pending and self.error(name) is None:
+                self.request_refresh([name], delay=0 if result is None else None)
+        if result is None and wait:
+            while result is None:
+                error = self.error(name)
+                with self._lock:
+                    future = self._running.get(name)
+                    scheduled = self._timer is not None and name in self._timer.args[0]
+                if future is not None:
+                    future.result()
+                elif error is not None:
+                    raise error
+                elif scheduled:
+                    time.sleep(0.01)
+                else:
+                    self.request_refresh([name], delay=0)
+                result = self._results.get(name)
+                if result is not None and result.path != db.DB_PATH:
+                    result = None
+        return result
+
+    def progress(self):
+        """(selesai, total) laporan dalam putaran hitung ulang terakhir."""
+        with self._lock:
+            if not self._running and self._timer is not None:
+                return 0, len(self._timer.args[0])
+            return len(self._done & self._round), len(self._round)
+
+    def error(self, name):
+        """Exception hitungan terakhir laporan itu jika gagal untuk versi database saat ini, atau None."""
+        with self._lock:
+            error = self._errors.get(name)
+        if error is None or error[1:] != (db.DB_PATH, db.change_token()):
+            return None
+        return error[0]
+
+    def is_refreshing(self, name=None):
+        with self._lock:
+            pending = set(self._running)
+            if self._timer is not None:
+                pending |= self._timer.args[0]
+        return bool(pending) if name is None else name in pending
+
+_precomputer = None
+_precomputer_lock = threading.Lock()
+
+def get_precomputer():
+    """Precomputer bersama untuk proses ini; terdaftar pada setiap transaksi tulis."""
+    global _precomputer
+    with _precomputer_lock:
+        if _precomputer is None:
+            _precomputer = Precomputer(REPORTS)
+            db.add_write_listener(_precomputer.request_refresh)
+        return _precomputer
+
+def latest(name, wait=True):
+    return get_precomputer().latest(name, wait)
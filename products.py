@@ -1,4 +1,6 @@
 # products
+# Data awal katalog toko. Migrasi 10 menyalinnya ke tabel products; katalog yang
+# dipakai aplikasi dibaca dari database (lihat catalog.py).
 import os
 
 # Get absolute path to images directory
@@ -0,0 +1,124 @@
+# read_cache.py
+# Cache baca bersama untuk seluruh sesi dalam satu proses. Kunci cache memuat
+# token perubahan database, jadi data yang tidak berubah dilayani dari memori
+# dan setiap commit otomatis membuat entri lama tidak terpakai lagi.
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import db_manager as db
+
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MAX_ENTRIES = 128
+
+def _sizeof(value, seen=None):
+    """
+    Perkiraan ukuran value di memori. Tuple, list, set, dan dict dihitung beserta
+    isinya (rekursif), sehingga misalnya tuple berisi DataFrame ikut dibatasi;
+    objek yang muncul lebih dari sekali hanya dihitung sekali.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(_sizeof(item, seen) for item in value)
+    return size
+
+class ReadCache:
+    """LRU dengan batas jumlah entri dan batas memori, plus counter hit/miss."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_entries=CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        """Return (True, value) jika ada di cache, (False, None) jika tidak."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def put(self, key, value, stale=None):
+        """
+        Simpan value. stale(key) -> bool menandai entri lama yang bisa langsung dibuang
+        (misalnya versi database sebelumnya dari fungsi yang sama).
+        """
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if stale is not None:
+                for old_key in [k for k in self._entries if stale(k)]:
+                    self._discard(old_key)
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _discard(self, key):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+read_cache = ReadCache()
+
+def cached_read(fn):
+    """
+    Decorator untuk fungsi baca tanpa efek samping. Hasil disimpan per
+    (fungsi, argumen, file database, db.change_token()).
+    DataFrame dikembalikan sebagai salinan dangkal agar kolom baru milik
+    pemanggil tidak ikut tersimpan di cache.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        path = db.DB_PATH
+        token = db.change_token()
+        key = (name, path, token, args, tuple(sorted(kwargs.items())))
+        hit, value = read_cache.get(key)
+        if not hit:
+            value = fn(*args, **kwargs)
+            read_cache.put(key, value, stale=lambda k: k[:2] == (name, path) and k[2] != token)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy(deep=False)
+        return value
+
+    return wrapper
+
+def cache_stats():
+    """Counter cache: hits, misses, evictions, entries, bytes."""
+    return read_cache.stats()
@@ -0,0 +1,19 @@
+# tests/conftest.py
+# Setiap test memakai file database sementara yang sudah dimigrasi; inventory.db
+# di repo tidak pernah disentuh.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_manager as db
+from migrations import migrate
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "test.db")
+    monkeypatch.setattr(db, "DB_PATH", path)
+    migrate()
+    return path
@@ -0,0 +1,74 @@
+# tests/test_db_manager.py
+import io
+
+import pytest
+
+import db_manager as db
+
+def _journal_count():
+    return db.get_conn().execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+@pytest.mark.parametrize("value", ["abc", "", "1,5", float("nan"), None])
+def test_to_rupiah_rejects_malformed_amount(value):
+    with pytest.raises(ValueError):
+        db.to_rupiah(value)
+
+@pytest.mark.parametrize("value, expected", [(1234, 1234), (1234.5, 1235), ("  99.49 ", 99), ("-0.5", -1)])
+def test_to_rupiah_rounds_half_up(value, expected):
+    assert db.to_rupiah(value) == expected
+
+def test_add_journal_entry_with_malformed_amount_returns_error(db_path):
+    ok, msg = db.add_journal_entry("2025-01-02", "Kas", "Modal", "1,5", "setoran")
+    assert not ok and "1,5" in msg
+    assert _journal_count() == 0
+
+def test_bulk_journal_with_malformed_amount_returns_error(db_path):
+    source = io.StringIO(
+        "tanggal,akun_debit,akun_kredit,jumlah,keterangan\n"
+        "2025-01-02,Kas,Modal,1000,setoran\n"
+        "2025-01-03,Kas,Modal,abc,setoran\n"
+    )
+    ok, msg = db.add_journal_entries_bulk(source)
+    assert not ok and "abc" in msg
+    assert _journal_count() == 0  # baris dalam chunk yang gagal tidak tersimpan
+
+def test_add_item_with_malformed_price_returns_error(db_path):
+    ok, msg = db.add_item("X1", "Cabe Uji", 5, "abc")
+    assert not ok and "abc" in msg
+
+def _stock(name):
+    return db.get_conn().execute("SELECT stock FROM inventory WHERE name = ?", (name,)).fetchone()[0]
+
+def test_decrease_cart_stock_rejects_unknown_names(db_path):
+    db.add_item("C1", "Cabe Rawit Hijau", 5, 10000)
+    ok, msg = db.decrease_cart_stock([("Cabe Rawit Hijau", 1), ("Cabe Rawit Putih", 2)])
+    assert not ok and "Cabe Rawit Putih" in msg
+    assert _stock("Cabe Rawit Hijau") == 5
+
+def test_decrease_cart_stock_is_all_or_nothing(db_path):
+    db.add_item("C1", "Cabe Rawit Hijau", 5, 10000)
+    db.add_item("C2", "Cabe Merah Ori", 1, 20000)
+    ok, msg = db.decrease_cart_stock([("Cabe Rawit Hijau", 2), ("Cabe Merah Ori", 3)])
+    assert not ok and "Cabe Merah Ori" in msg
+    assert (_stock("Cabe Rawit Hijau"), _stock("Cabe Merah Ori")) == (5, 1)
+
+    assert db.decrease_cart_stock([("Cabe Rawit Hijau", 2), ("Cabe Rawit Hijau", 1)]) == (True, "")
+    assert _stock("Cabe Rawit Hijau") == 2
+
+def test_tracked_item_names_excludes_catalog_only_products(db_path):
+    db.add_item("C1", "Cabe Rawit Hijau", 5, 10000)
+    assert db.get_tracked_item_names(["Cabe Rawit Hijau", "Cabe Rawit Putih"]) == {"Cabe Rawit Hijau"}
+    assert db.get_tracked_item_names([]) == set()
+
+def test_archived_activity_keeps_nocase_account_order(db_path):
+    pytest.importorskip("pyarrow")
+    assert db.add_account("bank daerah", "aset")[0]
+    assert db.add_journal_entry("2024-01-05", "bank daerah", "Modal", 1000, "setoran")[0]
+    assert db.add_journal_entry("2024-02-05", "Kas", "Modal", 500, "setoran")[0]
+    live_only = db.get_account_activity()
+    assert [r[0] for r in live_only] == ["bank daerah", "Kas", "Modal"]
+
+    assert db.close_period("2024-01")[0]
+    assert db.archive_closed_periods()[0]
+    assert db.get_account_activity() == live_only
+    assert [r[0] for r in db.get_trial_balance_as_of("2024-02-28")] == ["bank daerah", "Kas", "Modal"]
@@ -0,0 +1,54 @@
+# tests/test_exporter.py
+import io
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+import db_manager as db
+import exporter
+
+def _rows(count):
+    for i in range(count):
+        yield ("2025-01-%02d" % (i % 28 + 1), "Kas", "Modal", 1000 + i, f"setoran {i}")
+
+def test_csv_file_is_a_plain_reader_with_all_rows(db_path):
+    db.add_journal_entries_bulk(_rows(25))
+    f = exporter.csv_file(exporter.journal_frames(chunk_size=10))
+    assert isinstance(f, io.BufferedReader)
+    frame = pd.read_csv(f)
+    assert list(frame.columns) == list(exporter.JOURNAL_COLUMNS.values())
+    assert len(frame) == 25 and frame["Jumlah"].sum() == sum(1000 + i for i in range(25))
+
+def test_download_button_accepts_export_files(db_path):
+    from streamlit.elements.widgets.button import convert_data_to_bytes_and_infer_mime
+    data, _ = convert_data_to_bytes_and_infer_mime(
+        exporter.csv_file(exporter.journal_frames()), unsupported_error=TypeError("unsupported"))
+    assert data.startswith(b"ID,Tanggal")
+    if exporter.XLSX_AVAILABLE:
+        data, _ = convert_data_to_bytes_and_infer_mime(
+            exporter.xlsx_file(exporter.journal_frames()), unsupported_error=TypeError("unsupported"))
+        assert data[:2] == b"PK"
+
+def test_empty_ledger_export_has_header(db_path):
+    f = exporter.csv_file(exporter.ledger_frames("Kas"))
+    assert f.read().decode("utf-8").strip() == "ID,Tanggal,Keterangan,Debit,Kredit,Saldo"
+
+def _export_peak(chunk_size):
+    tracemalloc.start()
+    try:
+        f = exporter.csv_file(exporter.journal_frames(chunk_size=chunk_size))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, f.seek(0, io.SEEK_END)
+
+def test_csv_export_memory_does_not_grow_with_export_size(db_path):
+    db.add_journal_entries_bulk(_rows(5_000))
+    _export_peak(1_000)  # pemanasan: alokasi sekali pakai pandas/sqlite
+    small_peak, small_size = _export_peak(1_000)
+
+    db.add_journal_entries_bulk(_rows(35_000))
+    large_peak, large_size = _export_peak(1_000)
+    assert large_size > 7 * small_size
+    assert large_peak < small_peak * 1.5, (small_peak, large_peak)
@@ -0,0 +1,129 @@
+# tests/test_migrations.py
+# Migrasi dari skema lama, saldo akun yang dijaga trigger, nilai persediaan FIFO,
+# dan kunci periode tertutup.
+import sqlite3
+
+import pytest
+
+import db_manager as db
+import migrations
+from migrations import migrate
+
+LEGACY_SCHEMA = """
+    CREATE TABLE items (kode TEXT PRIMARY KEY, nama TEXT, stok INTEGER, harga REAL);
+    CREATE TABLE jurnal_umum (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tanggal TEXT, akun_debit TEXT, akun_kredit TEXT, jumlah REAL, keterangan TEXT
+    );
+    CREATE TABLE inventory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL, stock INTEGER NOT NULL, price REAL NOT NULL
+    );
+    CREATE TABLE journal (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL, debit_account TEXT NOT NULL, credit_account TEXT NOT NULL,
+        amount REAL NOT NULL, description TEXT
+    );
+
+    -- baris items lama dengan kode/nama tertukar, dan nama ganda di inventory
+    INSERT INTO items VALUES ('Cabe Rawit Hijau', '20', 7, 20000.0), ('CMK', 'Cabe Merah Keriting', 5, 30000.0);
+    INSERT INTO inventory (name, stock, price) VALUES
+        ('Cabe Merah Keriting', 3, 30000.0), ('Bawang Merah', 4, 40000.5), ('Bawang Merah', 2, 41000.0);
+    INSERT INTO journal (date, debit_account, credit_account, amount, description) VALUES
+        ('2024-01-03', 'Kas', 'Modal', 1000000.0, 'setoran');
+    INSERT INTO jurnal_umum (tanggal, akun_debit, akun_kredit, jumlah, keterangan) VALUES
+        ('2024-01-05', 'Persediaan', 'Kas', 250000.4, 'beli cabe'),
+        ('2024-01-06', 'Kas', 'Penjualan', 99999.5, 'jual');
+"""
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db, "DB_PATH", path)
+    return path
+
+def _recomputed_trial_balance():
+    totals = {}
+    for _, _, debit, credit, amount, _ in db.get_all_journal_entries():
+        totals.setdefault(debit, [0, 0])[0] += amount
+        totals.setdefault(credit, [0, 0])[1] += amount
+    return sorted(((a, d, c) for a, (d, c) in totals.items() if d or c), key=lambda r: r[0].lower())
+
+def test_migrate_legacy_database(legacy_db):
+    assert migrate() == migrations.MIGRATIONS[-1][0]
+    conn = db.get_conn()
+    assert migrations.current_version(conn) == migrations.MIGRATIONS[-1][0]
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {"items", "jurnal_umum"}
+
+    assert sorted(db.get_all_items(), key=lambda r: r[1]) == [
+        (None, "Bawang Merah", 6, 41000),
+        ("CMK", "Cabe Merah Keriting", 3, 30000),
+        ("20", "Cabe Rawit Hijau", 7, 20000),
+    ]
+    assert [r[1:5] for r in db.get_all_journal_entries()] == [
+        ("2024-01-03", "Kas", "Modal", 1000000),
+        ("2024-01-05", "Persediaan", "Kas", 250000),
+        ("2024-01-06", "Kas", "Penjualan", 100000),
+    ]
+    assert db.get_trial_balance() == _recomputed_trial_balance()
+    assert db.verify_account_balances() == []
+    # Stok lama menjadi satu lapisan biaya pembuka dengan harga barang saat ini
+    assert {r[1]: r[3] for r in db.get_inventory_valuation()}["Bawang Merah"] == 6 * 41000
+
+def test_balance_triggers_match_recomputed_trial_balance(db_path):
+    assert db.add_journal_entry("2024-03-01", "Kas", "Modal", 5000000, "setoran")[0]
+    assert db.add_journal_entry("2024-03-02", "Persediaan", "Kas", 1200000, "beli cabe")[0]
+    ok, result = db.add_journal_entries_bulk([
+        {"tanggal": "2024-03-03", "akun_debit": "Kas", "akun_kredit": "Penjualan",
+         "jumlah": 750000, "keterangan": "jual"},
+        {"tanggal": "2024-03-04", "akun_debit": "Beban Pokok Penjualan", "akun_kredit": "Persediaan",
+         "jumlah": 400000, "keterangan": "hpp"},
+    ])
+    assert ok, result
+    with db.transaction() as conn:
+        conn.execute("UPDATE journal SET amount = 1300000 WHERE description = 'beli cabe'")
+        conn.execute("UPDATE journal SET debit_account_id = (SELECT id FROM accounts WHERE name = 'Piutang')"
+                     " WHERE description = 'jual'")
+        conn.execute("DELETE FROM journal WHERE description = 'hpp'")
+
+    assert db.get_trial_balance() == _recomputed_trial_balance()
+    assert db.verify_account_balances() == []
+
+def test_fifo_cost_after_partial_consume(db_path):
+    assert db.add_item("CR", "Cabe Rawit", 10, 1000)[0]
+    assert db.add_item("CR", "Cabe Rawit", 10, 1500)[0]
+    assert db.decrease_item_stock("CR", 12)[0]
+    # 10 unit @1000 habis, 2 dari 10 unit @1500 terpakai
+    assert db.get_inventory_valuation() == [("CR", "Cabe Rawit", 8, 8 * 1500, 10 * 1000 + 2 * 1500)]
+    layers = db.get_conn().execute("SELECT unit_cost, qty_remaining FROM cost_layers ORDER BY id").fetchall()
+    assert [tuple(r) for r in layers] == [(1000, 0), (1500, 8)]
+
+    assert db.decrease_item_stock("CR", 3)[0]
+    assert db.get_inventory_valuation() == [("CR", "Cabe Rawit", 5, 5 * 1500, 10 * 1000 + 5 * 1500)]
+
+def test_closed_period_rejects_journal_writes(db_path):
+    assert db.add_journal_entry("2024-01-10", "Kas", "Modal", 1000, "setoran")[0]
+    assert db.close_period("2024-01")[0]
+
+    ok, msg = db.add_journal_entry("2024-01-20", "Kas", "Modal", 500, "terlambat")
+    assert not ok and "ditutup" in msg
+    ok, msg = db.add_journal_entries_bulk([
+        {"tanggal": "2024-02-01", "akun_debit": "Kas", "akun_kredit": "Modal", "jumlah": 100, "keterangan": "ok"},
+        {"tanggal": "2024-01-31", "akun_debit": "Kas", "akun_kredit": "Modal", "jumlah": 100, "keterangan": "lama"},
+    ])
+    assert not ok
+    with pytest.raises(sqlite3.IntegrityError, match="ditutup"):
+        with db.transaction() as conn:
+            conn.execute("UPDATE journal SET amount = 2000 WHERE date = '2024-01-10'")
+    with pytest.raises(sqlite3.IntegrityError, match="ditutup"):
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM journal WHERE date = '2024-01-10'")
+
+    assert db.add_journal_entry("2024-02-01", "Kas", "Modal", 500, "periode baru")[0]
+    assert [r[1] for r in db.get_all_journal_entries()] == ["2024-01-10", "2024-02-01"]
+    assert db.get_trial_balance() == [("Kas", 1500, 0), ("Modal", 0, 1500)]
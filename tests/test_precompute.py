@@ -0,0 +1,76 @@
+# tests/test_precompute.py
+import threading
+
+import pytest
+
+import db_manager as db
+from precompute import Precomputer
+
+class ReportFailed(Exception):
+    pass
+
+def _failing():
+    raise ReportFailed("query gagal")
+
+def _latest_with_timeout(worker, name, timeout=5):
+    """Panggil worker.latest di thread lain; gagal jika tidak selesai dalam timeout."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = worker.latest(name)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "latest() menggantung"
+    return outcome
+
+def test_latest_reraises_when_first_computation_fails(db_path):
+    worker = Precomputer({"bad": _failing}, debounce=0.01)
+    outcome = _latest_with_timeout(worker, "bad")
+    assert isinstance(outcome.get("error"), ReportFailed)
+    assert isinstance(worker.error("bad"), ReportFailed)
+    assert not worker.is_refreshing("bad")
+
+    # Versi database yang sama tidak dicoba ulang terus-menerus; exception tetap dilempar
+    outcome = _latest_with_timeout(worker, "bad")
+    assert isinstance(outcome.get("error"), ReportFailed)
+
+def test_failure_keeps_previous_result_and_retries_after_write(db_path):
+    calls = {"n": 0}
+
+    def flaky():
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise ReportFailed("terkunci")
+        return calls["n"]
+
+    worker = Precomputer({"report": flaky}, debounce=0.01)
+    assert worker.latest("report").value == 1
+
+    db.add_journal_entry("2025-01-02", "Kas", "Modal", 1000, "setoran")
+    worker.request_refresh(["report"], delay=0)
+    for _ in range(500):
+        if worker.error("report") is not None:
+            break
+        threading.Event().wait(0.01)
+    assert isinstance(worker.error("report"), ReportFailed)
+    assert worker.latest("report").value == 1  # hasil lama tetap dilayani
+
+    db.add_journal_entry("2025-01-03", "Kas", "Modal", 1000, "setoran")
+    assert worker.error("report") is None
+    for _ in range(500):
+        result = worker.latest("report")
+        if result.value == 3:
+            break
+        threading.Event().wait(0.01)
+    assert result.value == 3
+
+def test_latest_waits_for_first_result(db_path):
+    worker = Precomputer({"ok": lambda: 42}, debounce=0.01)
+    outcome = _latest_with_timeout(worker, "ok")
+    assert outcome["result"].value == 42
+    assert worker.error("ok") is None
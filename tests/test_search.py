@@ -0,0 +1,50 @@
+# tests/test_search.py
+# Benchmark kecil pencarian produk: biaya mengikuti jumlah kecocokan, bukan
+# ukuran katalog. Batas waktunya longgar (beberapa kali hasil ukur) agar stabil.
+import time
+
+import pytest
+
+import db_manager as db
+import manage
+
+CATALOG_SIZE = 20_000
+
+def _mean_ms(text, repeat=10):
+    db.search_products(text)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db.search_products(text)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+@pytest.fixture
+def catalog(db_path):
+    ok, result = db._ingest(
+        "INSERT INTO products (name, price, category, description) VALUES (?, ?, ?, ?)",
+        manage._bench_products(0, CATALOG_SIZE), db.BULK_CHUNK_SIZE
+    )
+    assert ok, result
+    rows = [(f"Habanero Spesial #{i}", 25000, "Vegetables", "Cabai habanero impor") for i in range(20)]
+    ok, result = db._ingest(
+        "INSERT INTO products (name, price, category, description) VALUES (?, ?, ?, ?)",
+        rows, db.BULK_CHUNK_SIZE
+    )
+    assert ok, result
+
+def test_search_returns_best_name_matches_first(catalog):
+    ids = db.search_products("habanero")
+    names = dict(db.get_conn().execute("SELECT id, name FROM products WHERE id IN ({})".format(
+        ",".join("?" * len(ids))), ids).fetchall())
+    assert len(ids) == 20
+    assert all(names[i].startswith("Habanero") for i in ids)
+
+def test_selective_search_does_not_scan_catalog(catalog):
+    # 20 kecocokan di katalog 20 ribu produk: terukur < 1 ms
+    assert _mean_ms("habanero") < 10
+
+def test_search_matching_whole_catalog_stays_within_budget(catalog):
+    # "sambal" ada di deskripsi setiap produk: semua baris dinilai BM25,
+    # terukur sekitar 40 ms pada 20 ribu produk
+    ids = db.search_products("sambal")
+    assert len(ids) == db.SEARCH_LIMIT
+    assert _mean_ms("sambal") < 150
@@ -0,0 +1,128 @@
+# thumbnails.py
+# Varian gambar produk yang sudah diperkecil per lebar tampilan. File varian
+# disimpan di folder thumbnail_cache dengan nama dari hash isi file sumber, jadi
+# varian hanya dibuat ulang saat isi gambar berubah. Pillow opsional: tanpa
+# Pillow, file asli yang dipakai.
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # thumbnail opsional; tanpa Pillow st.image menerima file asli
+    Image = ImageOps = None
+
+AVAILABLE = Image is not None
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnail_cache")
+
+# Lebar tampilan (px) per tempat gambar dipakai di app
+CART_WIDTH = 80
+CARD_WIDTH = 150
+LOGO_WIDTH = 200
+DETAIL_WIDTH = 300
+WIDTHS = (CART_WIDTH, CARD_WIDTH, LOGO_WIDTH, DETAIL_WIDTH)
+SCALE = 2  # piksel per px tampilan, agar tetap tajam di layar HiDPI
+JPEG_QUALITY = 85
+
+_small_sources = set()  # (hash, lebar) yang sumbernya sudah cukup kecil; tidak dibuka ulang
+
+@lru_cache(maxsize=1024)
+def _content_hash(path, mtime, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:20]
+
+def content_hash(path):
+    """Hash isi file; dihitung ulang hanya saat mtime atau ukuran file berubah."""
+    st = os.stat(path)
+    return _content_hash(path, st.st_mtime_ns, st.st_size)
+
+def _is_local(image):
+    return bool(image) and "://" not in image
+
+def _variant(image, width):
+    """(path varian, True jika baru dibuat) untuk satu file sumber dan lebar tampilan."""
+    source_hash = content_hash(image)
+    base = os.path.join(CACHE_DIR, f"{source_hash}-{width}")
+    if (source_hash, width) in _small_sources:
+        return image, False
+    for ext in (".jpg", ".png"):
+        if os.path.exists(base + ext):
+            return base + ext, False
+
+    with Image.open(image) as img:
+        img = ImageOps.exif_transpose(img)
+        pixels = width * SCALE
+        if img.width <= pixels:
+            _small_sources.add((source_hash, width))
+            return image, False
+        img.thumbnail((pixels, img.height * pixels // img.width + 1), Image.LANCZOS)
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        ext = ".png" if has_alpha else ".jpg"
+        if ext == ".jpg" and img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Tulis ke file sementara lalu rename, jadi sesi lain tidak membaca file setengah jadi
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=ext, dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if ext == ".jpg":
+                    img.save(f, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                else:
+                    img.save(f, "PNG", optimize=True)
+            os.chmod(tmp_path, 0o644)  # mkstemp membuat file 0600
+            os.replace(tmp_path, base + ext)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return base + ext, True
+
+def thumbnail(image, width):
+    """
+    Path varian gambar untuk lebar tampilan width. URL, file yang tidak ada,
+    gambar yang sudah cukup kecil, dan instalasi tanpa Pillow memakai sumbernya.
+    """
+    if not AVAILABLE or not _is_local(image):
+        return image
+    try:
+        return _variant(image, width)[0]
+    except OSError:
+        return image
+
+def warm(images, widths=WIDTHS):
+    """
+    Buat semua varian untuk daftar gambar. Mengembalikan (dibuat, sudah ada
+    atau tidak perlu, gagal) dan himpunan hash sumber yang dipakai.
+    """
+    if not AVAILABLE:
+        raise RuntimeError("Thumbnail membutuhkan paket Pillow")
+    created = cached = failed = 0
+    hashes = set()
+    for image in dict.fromkeys(images):
+        if not _is_local(image):
+            continue
+        try:
+            hashes.add(content_hash(image))
+            for width in widths:
+                if _variant(image, width)[1]:
+                    created += 1
+                else:
+                    cached += 1
+        except OSError:
+            failed += 1
+    return (created, cached, failed), hashes
+
+def prune(keep_hashes):
+    """Hapus varian yang sumbernya sudah tidak dipakai (hash tidak ada di keep_hashes)."""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.startswith(".") and name.split("-", 1)[0] not in keep_hashes:
+            os.remove(os.path.join(CACHE_DIR, name))
+            removed += 1
+    return removed
@@ -2,26 +2,35 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import os
+import numpy as np
+import pandas as pd
+from db_manager import to_rupiah
 
-def get_filtered_products(products, search_query, category_filter, min_price, max_price):
-    filtered_products = [
-        product for product in products
-        if (category_filter == "All" or product["category"] == category_filter) and
-           (search_query.lower() in product["name"].lower())
-    ]
-    return filtered_products
+# Pemisah ribuan gaya Indonesia: 1234567 -> 1.234.567
+_THOUSANDS = r"\B(?=(\d{3})+(?!\d))"
 
-def show_cart():
-    import streamlit as st
+def format_rupiah(values):
+    """
+    Format angka sebagai "Rp. 1.234.567" (dibulatkan ke rupiah penuh,
+    setengah ke atas seperti to_rupiah). Menerima satu angka atau satu kolom
+    (Series/array); kolom diformat sekaligus dengan operasi string pandas,
+    tanpa loop Python per baris kecuali untuk membulatkan kolom pecahan.
+    """
+    if np.isscalar(values):
+        return format_rupiah(pd.Series([values])).iloc[0]
+    amounts = pd.Series(values)
+    if not pd.api.types.is_integer_dtype(amounts):
+        # pandas round() membulatkan setengah ke genap; pakai pembulatan Decimal yang sama dengan to_rupiah
+        amounts = amounts.map(to_rupiah).astype("int64")
+    digits = amounts.abs().astype(str).str.replace(_THOUSANDS, ".", regex=True)
+    sign = pd.Series(np.where(amounts < 0, "-", ""), index=amounts.index)
+    return "Rp. " + sign + digits
 
-    st.subheader("🛒 Keranjang Belanja")
-    cart = st.session_state.get("cart", [])
-    
-    if not cart:
-        st.info("Keranjang masih kosong.")
-    else:
-        for item in cart:
-            st.markdown(f"- *{item['name']}* — Rp{item['price']:,}")
+def format_date(values):
+    """Tanggal ISO 'YYYY-MM-DD' -> 'DD/MM/YYYY' untuk satu kolom, dengan irisan string (tanpa parsing)."""
+    values = pd.Series(values, dtype="string")
+    return values.str[8:10] + "/" + values.str[5:7] + "/" + values.str[:4]
 
-    
-    
\ No newline at end of file
+def rupiah_column(label):
+    """Kolom angka untuk st.dataframe: nilai tetap numerik, tampilan dengan pemisah ribuan."""
+    return st.column_config.NumberColumn(f"{label} (Rp)", format="localized", step=1)